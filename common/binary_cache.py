@@ -0,0 +1,80 @@
+import os
+import tempfile
+from typing import IO, Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+
+def replace_file(path: str, write: Callable[[IO[bytes]], None]) -> None:
+    """
+    This function writes a file through a temporary file of the same directory, which replaces the file only once it
+    is complete. An interrupted write leaves the old file untouched, and a memory mapped copy of the old file stays
+    readable until it is closed.
+
+    :param path: the path of the file
+    :param write: the function writing the content to an open binary file
+    :return: nothing
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            write(f)
+
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _load_cache(file: str, cache_files: Dict[str, str]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    :return: the memory mapped arrays of the cache files, or None if some of them is missing, older than file or
+             unreadable
+    """
+    if not all(
+            os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(file)
+            for cache_file in cache_files.values()
+    ):
+        return None
+
+    try:
+        return {name: np.load(cache_file, mmap_mode='r') for name, cache_file in cache_files.items()}
+    except (OSError, ValueError, EOFError):
+        return None
+
+
+def load_cached_arrays(
+        file: str,
+        names: Iterable[str],
+        compute: Callable[[], Dict[str, np.ndarray]],
+        cache_directory: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    This function memory maps the arrays computed from file from a binary cache, the array called name being saved in
+    file.name.npy. The cache is computed again if it is older than file or unreadable, and each array is written
+    with replace_file, so that a cache is either complete or absent.
+
+    :param file: the path to the file the arrays are computed from
+    :param names: the names of the arrays
+    :param compute: the function computing the arrays from file, as a dictionary linking each name to its array
+    :param cache_directory: the directory of the cache, by default the directory of the file
+    :return: the dictionary linking each name to its memory mapped array
+    """
+    cache_prefix = os.path.join(
+        cache_directory if cache_directory is not None else os.path.dirname(os.path.abspath(file)),
+        os.path.basename(file)
+    )
+    cache_files = {name: f'{cache_prefix}.{name}.npy' for name in names}
+    arrays = _load_cache(file, cache_files)
+
+    if arrays is None:
+        computed = compute()
+
+        for name, cache_file in cache_files.items():
+            replace_file(cache_file, lambda f, array=computed[name]: np.save(f, array))
+
+        arrays = {name: np.load(cache_file, mmap_mode='r') for name, cache_file in cache_files.items()}
+
+    return arrays
@@ -0,0 +1,15 @@
+import numpy as np
+
+# number of bits set in each byte, used when numpy does not provide bitwise_count
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """
+    :param words: a matrix of 64 bits words
+    :return: an array containing the number of bits set in each row of the matrix
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    else:
+        return _POPCOUNT[words.view(np.uint8)].sum(axis=1)
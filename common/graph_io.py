@@ -0,0 +1,167 @@
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from binary_cache import load_cached_arrays
+
+
+class EdgeList(NamedTuple):
+    """
+    The edges of a graph whose vertices are relabelled from 0 to vertices_number - 1. The original label of vertex i is
+    labels[i], the labels being sorted.
+    """
+    edges: np.ndarray
+    weights: Optional[np.ndarray]
+    labels: np.ndarray
+
+    @property
+    def vertices_number(self) -> int:
+        return len(self.labels)
+
+
+def iter_edges(
+        file: str,
+        weighted: bool = False,
+        chunk_size: int = 2 ** 20
+) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    This function reads a file containing an edge per line, as two integer vertices and optionally a weight separated
+    by commas or whitespaces, in chunks of about chunk_size bytes. Empty lines and lines starting with # are skipped.
+
+    :param file: the path to the file to be read
+    :param weighted: if true, every line contains the weight of the edge as third column
+    :param chunk_size: the approximate number of bytes read for each chunk
+    :return: an iterator over the chunks, each one an array of shape (edges_number, 2) of edges in the order of the
+             file, and the array of shape (edges_number,) of their weights or None if the edges are not weighted
+    """
+    columns = 3 if weighted else 2
+
+    with open(file, 'r') as f:
+        while True:
+            lines = f.readlines(chunk_size)
+
+            if not lines:
+                break
+
+            tokens = ' '.join(line for line in lines if not line.startswith('#')).replace(',', ' ').split()
+
+            if not weighted:
+                yield np.array(tokens, dtype=np.int64).reshape(-1, 2), None
+            else:
+                table = np.array(tokens).reshape(-1, columns)
+                yield table[:, :2].astype(np.int64), table[:, 2].astype(np.float64)
+
+
+def read_edge_list(file: str, weighted: bool = False, chunk_size: int = 2 ** 20) -> EdgeList:
+    """
+    This function reads a file containing an edge per line, see iter_edges, and relabels its vertices.
+
+    :param file: the path to the file to be read
+    :param weighted: if true, every line contains the weight of the edge as third column
+    :param chunk_size: the approximate number of bytes read for each chunk
+    :return: the edge list of the file
+    """
+    chunks = list(iter_edges(file=file, weighted=weighted, chunk_size=chunk_size))
+    edges = np.concatenate([edges for edges, _ in chunks]) if chunks else np.empty((0, 2), dtype=np.int64)
+    weights = (
+        np.concatenate([weights for _, weights in chunks]) if chunks else np.empty(0, dtype=np.float64)
+    ) if weighted else None
+    labels, edges = np.unique(edges, return_inverse=True)
+
+    return EdgeList(edges=edges.reshape(-1, 2).astype(np.int64), weights=weights, labels=labels)
+
+
+def load_edge_list(
+        file: str,
+        weighted: bool = False,
+        cache: bool = False,
+        cache_directory: Optional[str] = None,
+        chunk_size: int = 2 ** 20
+) -> EdgeList:
+    """
+    This function reads a file containing an edge per line into an edge list. If cache is true, the arrays of the edge
+    list are saved in binary format and memory mapped on later calls, until the file is modified, see
+    binary_cache.load_cached_arrays.
+
+    :param file: the path to the file to be read
+    :param weighted: if true, every line contains the weight of the edge as third column
+    :param cache: if true, uses a binary cache of the file
+    :param cache_directory: the directory of the cache, by default the directory of the file
+    :param chunk_size: the approximate number of bytes parsed at once
+    :return: the edge list of the file
+    """
+    if not cache:
+        return read_edge_list(file=file, weighted=weighted, chunk_size=chunk_size)
+
+    def compute() -> Dict[str, np.ndarray]:
+        edge_list = read_edge_list(file=file, weighted=weighted, chunk_size=chunk_size)
+
+        return {name: array for name, array in edge_list._asdict().items() if array is not None}
+
+    arrays = load_cached_arrays(
+        file=file,
+        names=('edges', 'weights', 'labels') if weighted else ('edges', 'labels'),
+        compute=compute,
+        cache_directory=cache_directory
+    )
+
+    return EdgeList(edges=arrays['edges'], weights=arrays.get('weights'), labels=arrays['labels'])
+
+
+def to_coo(edge_list: EdgeList) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    This function computes the symmetric adjacency matrix of the undirected graph of the edge list in coordinate
+    format. An edge listed more than once, in either direction, keeps the weight of its last occurrence, and self loops
+    appear once on the diagonal.
+
+    :param edge_list: the edge list of the graph
+    :return: the rows, the columns and the values of the non zero entries, sorted by row and column
+    """
+    edges = np.sort(edge_list.edges, axis=1)
+    weights = edge_list.weights if edge_list.weights is not None else np.ones(len(edges), dtype=np.float64)
+    keys = edges[:, 0] * edge_list.vertices_number + edges[:, 1]
+    # the first occurrence in the reversed keys is the last one in the file
+    keys, last = np.unique(keys[::-1], return_index=True)
+    last = len(edges) - 1 - last
+    edges, weights = edges[last], weights[last]
+
+    loops = edges[:, 0] == edges[:, 1]
+    rows = np.concatenate([edges[:, 0], edges[~loops, 1]])
+    columns = np.concatenate([edges[:, 1], edges[~loops, 0]])
+    values = np.concatenate([weights, weights[~loops]])
+    order = np.lexsort((columns, rows))
+
+    return rows[order], columns[order], values[order]
+
+
+def to_csr(edge_list: EdgeList) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    This function computes the symmetric adjacency matrix of the undirected graph of the edge list in compressed sparse
+    row format, see to_coo.
+
+    :param edge_list: the edge list of the graph
+    :return: the offsets of the rows, of shape (vertices_number + 1,), the sorted columns of each row and their values
+    """
+    rows, columns, values = to_coo(edge_list)
+    offsets = np.zeros(edge_list.vertices_number + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=edge_list.vertices_number), out=offsets[1:])
+
+    return offsets, columns, values
+
+
+def adjacency_matrix(edge_list: EdgeList):
+    """
+    :param edge_list: the edge list of the graph
+    :return: the symmetric adjacency matrix of the graph as a scipy sparse matrix in CSR format
+    """
+    from scipy import sparse
+
+    offsets, columns, values = to_csr(edge_list)
+
+    return sparse.csr_matrix((values, columns, offsets), shape=(edge_list.vertices_number,) * 2)
+
+
+if __name__ == "__main__":
+    edge_list = load_edge_list(file='../lab3/data/facebook_combined.txt')
+
+    print(f'{edge_list.vertices_number} vertices and {len(edge_list.edges)} edges.')
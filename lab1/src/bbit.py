@@ -0,0 +1,124 @@
+from typing import List, NamedTuple
+
+import numpy as np
+
+import _common  # noqa: F401, makes the common modules importable
+from bits import popcount_rows
+from min_hashing import min_hash_matrix
+
+# for each b, the mask of the lowest bit of every b bits lane of a 64 bits word
+_LANE_MASKS = {
+    1: np.uint64(0xFFFFFFFFFFFFFFFF),
+    2: np.uint64(0x5555555555555555),
+    4: np.uint64(0x1111111111111111),
+    8: np.uint64(0x0101010101010101)
+}
+
+
+class PackedSignatures(NamedTuple):
+    """
+    The lowest b bits of each value of the signatures of the documents, packed in 64 bits words. Row i contains the
+    signature of document i, value j being stored in bits (j % (64 / b)) * b to (j % (64 / b) + 1) * b of word
+    j // (64 / b).
+    """
+    words: np.ndarray
+    b: int
+    hash_length: int
+
+
+def pack_signatures(M: np.ndarray, b: int = 1) -> PackedSignatures:
+    """
+    This function keeps the lowest b bits of each value of the signatures, as in
+
+    'P. Li and A. C. König, b-Bit Minwise Hashing, WWW'10.'
+
+    and packs them in 64 bits words, so that the signatures take 64 / b times less memory.
+    :param M: matrix having as columns the signatures of the documents
+    :param b: the number of bits kept for each value, either 1, 2, 4 or 8
+    :return: the packed signatures
+    """
+    if b not in _LANE_MASKS:
+        raise ValueError(f'pack_signatures() supports b in {sorted(_LANE_MASKS)}, not {b}')
+
+    hash_length, documents_number = M.shape
+    values_per_word = 64 // b
+    words_number = -(-hash_length // values_per_word)
+
+    # shape (documents_number, words_number * values_per_word), the padding values being zero in every signature
+    values = np.zeros(shape=(documents_number, words_number * values_per_word), dtype=np.uint64)
+    values[:, :hash_length] = (np.asarray(M).T & ((1 << b) - 1)).astype(np.uint64)
+    shifts = np.arange(values_per_word, dtype=np.uint64) * np.uint64(b)
+
+    # the values of a word occupy disjoint bits, so their sum is their bitwise or
+    words = (values.reshape(documents_number, words_number, values_per_word) << shifts).sum(axis=2, dtype=np.uint64)
+
+    return PackedSignatures(words=words, b=b, hash_length=hash_length)
+
+
+def compare_packed_pairs(
+        signatures: PackedSignatures,
+        pairs: np.ndarray,
+        block_size: int = 2 ** 16
+) -> np.ndarray:
+    """
+    Estimates the Jaccard similarity of many pairs of documents from their packed signatures. The values differing in
+    two signatures are the lanes of b bits having at least a bit set in the xor of the words, and they are counted
+    with a popcount once each lane is folded on its lowest bit. Since two different values agree on their lowest b
+    bits with probability 2^-b, the fraction P of equal values is corrected as (P - 2^-b) / (1 - 2^-b).
+    :param signatures: the packed signatures of the documents
+    :param pairs: an array of shape (pairs_number, 2) containing the indices of the documents to be compared
+    :param block_size: the number of pairs compared at once
+    :return: an array of shape (pairs_number,) containing the estimated similarity of each pair, between 0 and 1
+    """
+    words, b, hash_length = signatures
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    similarities = np.empty(shape=len(pairs), dtype=np.float64)
+    collision = 2.0 ** -b
+
+    for start in range(0, len(pairs), block_size):
+        block = pairs[start:start + block_size]
+        differences = words[block[:, 0]] ^ words[block[:, 1]]
+
+        for shift in (1, 2, 4)[:b.bit_length() - 1]:
+            differences |= differences >> np.uint64(shift)
+
+        equal = hash_length - popcount_rows(differences & _LANE_MASKS[b])
+        similarities[start:start + block_size] = (equal / hash_length - collision) / (1 - collision)
+
+    return np.clip(similarities, 0.0, 1.0)
+
+
+def verify_packed_pairs(
+        signatures: PackedSignatures,
+        candidates: np.ndarray,
+        t: float,
+        block_size: int = 2 ** 16
+) -> np.ndarray:
+    """
+    This function keeps the candidate pairs of documents with similarity larger than t estimated from the packed
+    signatures, as lsh.verify_pairs does from the full ones.
+    :param signatures: the packed signatures of the documents
+    :param candidates: an array of shape (pairs_number, 2) containing the candidate pairs
+    :param t: threshold for the similarity
+    :param block_size: the number of candidate pairs verified at once
+    :return: an array of shape (similar_pairs_number, 2) containing the pairs with similarity larger than t
+    """
+    similar_pairs: List[np.ndarray] = [np.empty(shape=(0, 2), dtype=np.int64)]
+
+    for start in range(0, len(candidates), block_size):
+        block = candidates[start:start + block_size]
+        similar_pairs.append(
+            block[compare_packed_pairs(signatures=signatures, pairs=block, block_size=block_size) >= t]
+        )
+
+    return np.concatenate(similar_pairs)
+
+
+if __name__ == "__main__":
+    shingles = np.random.default_rng(seed=0).choice(2 ** 31, size=150, replace=False).tolist()
+    # two documents with Jaccard similarity 1 / 3
+    M = min_hash_matrix([set(shingles[:100]), set(shingles[50:])], hash_length=1024)
+
+    for b in (1, 2, 4, 8):
+        signatures = pack_signatures(M, b=b)
+        print(b, signatures.words.nbytes, compare_packed_pairs(signatures, np.array([[0, 1]])))
@@ -0,0 +1,79 @@
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from compare_sets import compare_sets_pairs
+from compare_signatures import compare_signatures_pairs
+from min_hashing import signature_schemes, to_csr
+
+
+def benchmark_signature_schemes(
+        documents: Union[Iterable[Set[int]], Tuple[np.ndarray, np.ndarray]],
+        hash_lengths: Iterable[int],
+        schemes: Iterable[str] = ('min_hash', 'one_permutation'),
+        pairs: Optional[np.ndarray] = None,
+        pairs_number: int = 10000,
+        seed: int = 0
+) -> Dict[str, List[Tuple[float, float]]]:
+    """
+    This function measures the time spent computing the signatures of the documents with each scheme for several
+    lengths of the signatures, and the error of the similarities they estimate with respect to the exact Jaccard
+    similarities.
+
+    :param documents: either the sets of hashed shingling representing the documents or a tuple (shingles, offsets) in
+                      the CSR-style format returned by to_csr
+    :param hash_lengths: the lengths of the signatures
+    :param schemes: the names of the signature schemes, as in signature_schemes
+    :param pairs: an array of shape (pairs_number, 2) of the pairs of documents whose similarity is estimated, by
+                  default pairs_number random pairs
+    :param pairs_number: the number of random pairs, if pairs is not given
+    :param seed: the seed of the hash functions and of the random pairs
+    :return: a dictionary linking each scheme to its time in seconds and root mean squared error, one per length
+    """
+    documents = documents if isinstance(documents, tuple) else to_csr(documents)
+    documents_number = len(documents[1]) - 1
+
+    if pairs is None:
+        pairs = np.random.default_rng(seed=seed).integers(low=0, high=documents_number, size=(pairs_number, 2))
+
+    similarities = compare_sets_pairs(documents, pairs)
+    schemes = list(schemes)
+    results: Dict[str, List[Tuple[float, float]]] = {scheme: [] for scheme in schemes}
+
+    print(f'{"length":>8}' + ''.join(f'{scheme + " time":>22}{scheme + " rmse":>22}' for scheme in schemes))
+
+    for hash_length in hash_lengths:
+        for scheme in schemes:
+            start = time.perf_counter()
+            M = signature_schemes[scheme](documents, hash_length=hash_length, seed=seed)
+            duration = time.perf_counter() - start
+            error = float(np.sqrt(np.mean((compare_signatures_pairs(M, pairs) - similarities) ** 2)))
+            results[scheme].append((duration, error))
+
+        print(
+            f'{hash_length:>8}' + ''.join(f'{results[scheme][-1][0]:>21.3f}s{results[scheme][-1][1]:>22.4f}'
+                                          for scheme in schemes)
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    generator = np.random.default_rng(seed=0)
+    universe = np.arange(2 ** 24)
+    documents = []
+
+    # pairs of documents 2i and 2i + 1 sharing a random fraction of their shingles
+    for _ in range(1000):
+        size = int(generator.integers(low=50, high=2000))
+        shingles = generator.choice(universe, size=2 * size, replace=False)
+        shared = int(generator.integers(low=0, high=size + 1))
+        documents.append(set(shingles[:size].tolist()))
+        documents.append(set(shingles[:shared].tolist() + shingles[size:2 * size - shared].tolist()))
+
+    benchmark_signature_schemes(
+        documents=documents,
+        hash_lengths=[64, 128, 256, 512, 1024],
+        pairs=np.arange(len(documents)).reshape(-1, 2)
+    )
@@ -1,4 +1,8 @@
-from typing import Set
+from typing import Iterable, Set, Tuple, Union
+
+import numpy as np
+
+from min_hashing import to_csr
 
 
 def compare_sets(A: Set[int], B: Set[int]) -> float:
@@ -8,4 +12,83 @@ def compare_sets(A: Set[int], B: Set[int]) -> float:
     :param B: set of hashed shingling in document B
     :return: the Jaccard similarity between A and B
     """
-    return len(A & B) / len(A | B)
+    intersection = len(A & B)
+
+    return intersection / (len(A) + len(B) - intersection)
+
+
+def _gather(shingles: np.ndarray, offsets: np.ndarray, documents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function concatenates the shingles of the given documents.
+    :param shingles: the array of all the shingles
+    :param offsets: the offsets at which the shingles of each document start
+    :param documents: the indices of the documents
+    :return: the concatenated shingles and the number of shingles of each document
+    """
+    lengths = offsets[documents + 1] - offsets[documents]
+    ends = np.cumsum(lengths)
+    positions = np.repeat(offsets[documents] - (ends - lengths), lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+    return shingles[positions], lengths
+
+
+def compare_sets_pairs(
+        documents: Union[Iterable[Set[int]], Tuple[np.ndarray, np.ndarray]],
+        pairs: np.ndarray,
+        block_size: int = 2 ** 22
+) -> np.ndarray:
+    """
+    This function computes the Jaccard similarity of many pairs of documents at once. For each block of pairs, the
+    shingles of both documents are sorted together and the intersection is counted as the number of repeated ids.
+    :param documents: either the sets of hashed shingling representing the documents or a tuple (shingles, offsets) in
+                      the CSR-style format returned by to_csr, where each document has no repeated shingles
+    :param pairs: an array of shape (pairs_number, 2) containing the indices of the documents to be compared
+    :param block_size: the approximate number of shingles sorted at once
+    :return: an array of shape (pairs_number,) containing the Jaccard similarity of each pair
+    """
+    shingles, offsets = documents if isinstance(documents, tuple) else to_csr(documents)
+    shingles = np.asarray(shingles, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+
+    similarities = np.empty(shape=len(pairs), dtype=np.float64)
+    average_length = max(1, 2 * len(shingles) // max(1, len(offsets) - 1))
+    pairs_per_block = max(1, block_size // average_length)
+
+    for start in range(0, len(pairs), pairs_per_block):
+        block = pairs[start:start + pairs_per_block]
+        left, left_lengths = _gather(shingles, offsets, block[:, 0])
+        right, right_lengths = _gather(shingles, offsets, block[:, 1])
+
+        ids = np.concatenate([left, right])
+        owners = np.concatenate([
+            np.repeat(np.arange(len(block)), left_lengths),
+            np.repeat(np.arange(len(block)), right_lengths)
+        ])
+        order = np.lexsort((ids, owners))
+        ids, owners = ids[order], owners[order]
+        repeated = (ids[1:] == ids[:-1]) & (owners[1:] == owners[:-1])
+
+        intersections = np.bincount(owners[1:][repeated], minlength=len(block))
+        similarities[start:start + len(block)] = intersections / (left_lengths + right_lengths - intersections)
+
+    return similarities
+
+
+def compare_sets_matrix(documents: Union[Iterable[Set[int]], Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """
+    This function computes the Jaccard similarity between all the pairs of documents. It is meant for small
+    collections, since the result is a dense matrix.
+    :param documents: either the sets of hashed shingling representing the documents or a tuple (shingles, offsets) in
+                      the CSR-style format returned by to_csr
+    :return: a matrix of shape (documents_number, documents_number) containing the similarities
+    """
+    shingles, offsets = documents if isinstance(documents, tuple) else to_csr(documents)
+    documents_number = len(offsets) - 1
+    left, right = np.triu_indices(documents_number, k=1)
+
+    similarities = np.eye(documents_number, dtype=np.float64)
+    similarities[left, right] = compare_sets_pairs((shingles, offsets), np.stack([left, right], axis=1))
+    similarities[right, left] = similarities[left, right]
+
+    return similarities
@@ -1,3 +1,5 @@
+from typing import Tuple
+
 import numpy as np
 
 
@@ -9,4 +11,63 @@ def compare_signatures(A: np.ndarray, B: np.ndarray) -> float:
     :param B: the minhashed representation of document A
     :return: an estimate of the Jaccard similarity between A and B
     """
-    return sum(A == B) / len(A)
+    return np.count_nonzero(A == B) / len(A)
+
+
+def compare_signatures_pairs(M: np.ndarray, pairs: np.ndarray, block_size: int = 2 ** 16) -> np.ndarray:
+    """
+    Estimates the Jaccard similarity of many pairs of documents at once. The pairs are compared in blocks of block_size
+    pairs to bound the memory used.
+    :param M: matrix having as columns the signatures of the documents
+    :param pairs: an array of shape (pairs_number, 2) containing the indices of the documents to be compared
+    :param block_size: the number of pairs compared at once
+    :return: an array of shape (pairs_number,) containing the estimated similarity of each pair
+    """
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    similarities = np.empty(shape=len(pairs), dtype=np.float64)
+
+    for start in range(0, len(pairs), block_size):
+        block = pairs[start:start + block_size]
+        similarities[start:start + block_size] = np.count_nonzero(
+            M[:, block[:, 0]] == M[:, block[:, 1]],
+            axis=0
+        ) / len(M)
+
+    return similarities
+
+
+def compare_signatures_matrix(M: np.ndarray, block_size: int = 2 ** 24) -> np.ndarray:
+    """
+    Estimates the Jaccard similarity between all the pairs of documents. It is meant for small collections, since the
+    result is a dense matrix.
+    :param M: matrix having as columns the signatures of the documents
+    :param block_size: the maximum number of signature entries compared at once
+    :return: a matrix of shape (documents_number, documents_number) containing the estimated similarities
+    """
+    hash_length, documents_number = M.shape
+    similarities = np.empty(shape=(documents_number, documents_number), dtype=np.float64)
+    rows_per_block = max(1, block_size // max(1, hash_length * documents_number))
+
+    for start in range(0, documents_number, rows_per_block):
+        # shape (hash_length, rows in the block, documents_number)
+        equal = M[:, start:start + rows_per_block, np.newaxis] == M[:, np.newaxis, :]
+        similarities[start:start + rows_per_block] = np.count_nonzero(equal, axis=0) / hash_length
+
+    return similarities
+
+
+def top_k_pairs(similarities: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function returns the k most similar pairs of distinct documents given their similarity matrix.
+    :param similarities: a symmetric matrix of shape (documents_number, documents_number) of similarities
+    :param k: the number of pairs to be returned
+    :return: an array of shape (k, 2) containing the pairs, sorted by decreasing similarity, and an array of shape (k,)
+             containing their similarities
+    """
+    left, right = np.triu_indices(len(similarities), k=1)
+    values = similarities[left, right]
+    k = min(k, len(values))
+    best = np.argpartition(-values, k - 1)[:k] if k > 0 else np.empty(shape=0, dtype=np.int64)
+    best = best[np.argsort(-values[best], kind='stable')]
+
+    return np.stack([left[best], right[best]], axis=1), values[best]
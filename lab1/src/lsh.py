@@ -1,60 +1,181 @@
 from math import ceil
-from typing import Tuple, Dict, Set
+from typing import Iterable, Iterator, List, NamedTuple, Set, Tuple
 
 import numpy as np
 
-from compare_signatures import compare_signatures
+from compare_signatures import compare_signatures_pairs
 
-from itertools import combinations
+# multiplier of the polynomial hash used on the bands, an odd 64 bits constant
+BAND_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class BandStatistics(NamedTuple):
+    band: int
+    buckets: int
+    colliding_buckets: int
+    largest_bucket: int
+    candidate_pairs: int
 
 
 def hash_band(band: np.ndarray) -> np.ndarray:
     """
-    This function might be changed later to improve performance. It is meant to hash the band of each document.
+    This function hashes the band of each document as a whole with a polynomial hash over its rows, computed modulo
+    2 ** 64. Two documents collide only if their bands are equal or, with negligible probability, by chance.
     :param band: the matrix of shape (band_length, documents_number)
-    :return: an array of shape (1, documents_number) containing the hashed band for each document
+    :return: an array of shape (documents_number,) containing the hashed band for each document
     """
-    return np.sum(a=band, axis=0)
+    hashed_band = np.zeros(shape=band.shape[1], dtype=np.uint64)
+
+    for row in np.asarray(band).astype(np.uint64):
+        hashed_band = hashed_band * BAND_HASH_MULTIPLIER + row
+
+    return hashed_band
 
 
-def lsh(M: np.ndarray, t: float, b: int = 1) -> Set[Tuple[int, int]]:
+def bands(hash_length: int, b: int) -> Iterator[Tuple[int, int]]:
     """
-    This function takes as input the minhash signatures of M.shape[1] documents and returns all the pairs of documents
-    with estimated similarity larger than t.
-    :param M: matrix having as columns the signatures of the documents
-    :param t: threshold for the similarity
+    This function splits the rows of the signatures in b bands.
+    :param hash_length: the length of the signatures
     :param b: number of bands
-    :return: the pairs of indices of documents with estimated similarity larger than t
+    :return: an iterator over the first and last (excluded) row of each band
     """
-    candidates: Set[Tuple[int, int]] = set()
-    hash_length: int = len(M)
-    documents_number: int = M.shape[1]
     band_length: int = ceil(hash_length / b)
 
     for band_index in range(0, hash_length, band_length):
-        collision_hashmap: Dict[int, Set[int]] = {}
+        yield band_index, min(band_index + band_length, hash_length)
+
+
+def band_buckets(hashed_band: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    This function groups the documents having the same band hash in buckets by sorting the hashes.
+    :param hashed_band: an array of shape (documents_number,) containing the hashed band for each document
+    :return: the documents indices sorted by bucket, the position in this order where each bucket starts and the size
+             of each bucket
+    """
+    order = np.argsort(hashed_band, kind='stable')
+    _, starts, sizes = np.unique(hashed_band[order], return_index=True, return_counts=True)
+
+    return order, starts, sizes
 
-        # shape (band_length, documents_number)
-        band = M[band_index: min(band_index + band_length, hash_length), :]
 
-        # shape (1, documents_number)
-        hashed_band = hash_band(band=band)
+def bucket_pairs(order: np.ndarray, starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    This function generates all the pairs of documents sharing a bucket. The pairs are generated at once for all the
+    buckets having the same size.
+    :param order: the documents indices sorted by bucket
+    :param starts: the position in order where each bucket starts
+    :param sizes: the size of each bucket
+    :return: an array of shape (pairs_number, 2) containing the pairs, with the smallest index first
+    """
+    pairs = [np.empty(shape=(0, 2), dtype=np.int64)]
+
+    for size in np.unique(sizes[sizes > 1]):
+        # shape (buckets with this size, size)
+        members = order[starts[sizes == size][:, np.newaxis] + np.arange(size)]
+        left, right = np.triu_indices(size, k=1)
+        pairs.append(
+            np.stack([members[:, left].ravel(), members[:, right].ravel()], axis=1)
+        )
+
+    pairs = np.concatenate(pairs).astype(np.int64)
 
-        for document_index in range(documents_number):
-            document_band_hash = hashed_band[document_index]
+    return np.sort(pairs, axis=1)
+
+
+def unique_pairs(pairs: Iterable[np.ndarray], documents_number: int) -> np.ndarray:
+    """
+    This function merges arrays of pairs of documents removing the duplicates.
+    :param pairs: arrays of shape (pairs_number, 2) containing pairs, with the smallest index first
+    :param documents_number: the number of documents
+    :return: an array of shape (pairs_number, 2) containing the distinct pairs, with the smallest index first
+    """
+    # the pairs are encoded as first * documents_number + second to remove the duplicates
+    encoded_pairs = np.unique(
+        np.concatenate(
+            [np.empty(shape=0, dtype=np.int64)] + [
+                band_pairs[:, 0] * documents_number + band_pairs[:, 1]
+                for band_pairs in pairs
+            ]
+        )
+    )
 
-            if document_band_hash in collision_hashmap:
-                collision_hashmap[document_band_hash].add(document_index)
-            else:
-                collision_hashmap[document_band_hash] = {document_index}
+    return np.stack([encoded_pairs // documents_number, encoded_pairs % documents_number], axis=1)
 
-        for collision_set in collision_hashmap.values():
-            candidates |= set(combinations(collision_set, 2))
 
+def candidate_pairs(M: np.ndarray, b: int = 1) -> np.ndarray:
+    """
+    This function returns all the pairs of documents sharing a bucket in at least one band.
+    :param M: matrix having as columns the signatures of the documents
+    :param b: number of bands
+    :return: an array of shape (pairs_number, 2) containing the distinct candidate pairs, with the smallest index first
+    """
+    return unique_pairs(
+        pairs=(
+            bucket_pairs(*band_buckets(hash_band(M[start:end, :])))
+            for start, end in bands(len(M), b)
+        ),
+        documents_number=M.shape[1]
+    )
+
+
+def band_statistics(M: np.ndarray, b: int = 1) -> List[BandStatistics]:
+    """
+    This function reports, for each band, how the documents are spread across the buckets. It is meant to help the
+    tuning of the number of bands.
+    :param M: matrix having as columns the signatures of the documents
+    :param b: number of bands
+    :return: the statistics of the buckets of each band
+    """
+    statistics: List[BandStatistics] = []
+
+    for band, (start, end) in enumerate(bands(len(M), b)):
+        _, _, sizes = band_buckets(hash_band(M[start:end, :]))
+        statistics.append(
+            BandStatistics(
+                band=band,
+                buckets=len(sizes),
+                colliding_buckets=int(np.count_nonzero(sizes > 1)),
+                largest_bucket=int(sizes.max(initial=0)),
+                candidate_pairs=int(np.sum(sizes * (sizes - 1) // 2))
+            )
+        )
+
+    return statistics
+
+
+def verify_pairs(M: np.ndarray, candidates: np.ndarray, t: float, block_size: int = 2 ** 16) -> np.ndarray:
+    """
+    This function keeps the candidate pairs of documents with estimated similarity larger than t. The candidates are
+    compared in blocks of block_size pairs.
+    :param M: matrix having as columns the signatures of the documents
+    :param candidates: an array of shape (pairs_number, 2) containing the candidate pairs
+    :param t: threshold for the similarity
+    :param block_size: the number of candidate pairs verified at once
+    :return: an array of shape (similar_pairs_number, 2) containing the pairs with similarity larger than t
+    """
+    similar_pairs: List[np.ndarray] = [np.empty(shape=(0, 2), dtype=np.int64)]
+
+    for start in range(0, len(candidates), block_size):
+        block = candidates[start:start + block_size]
+        similar_pairs.append(block[compare_signatures_pairs(M=M, pairs=block, block_size=block_size) >= t])
+
+    return np.concatenate(similar_pairs)
+
+
+def lsh(M: np.ndarray, t: float, b: int = 1, block_size: int = 2 ** 16) -> Set[Tuple[int, int]]:
+    """
+    This function takes as input the minhash signatures of M.shape[1] documents and returns all the pairs of documents
+    with estimated similarity larger than t.
+    :param M: matrix having as columns the signatures of the documents
+    :param t: threshold for the similarity
+    :param b: number of bands
+    :param block_size: the number of candidate pairs verified at once
+    :return: the pairs of indices of documents with estimated similarity larger than t
+    """
     return set(
-        filter(
-            lambda pair: compare_signatures(M[:, pair[0]], M[:, pair[1]]) >= t,
-            candidates
+        map(
+            tuple,
+            verify_pairs(M=M, candidates=candidate_pairs(M=M, b=b), t=t, block_size=block_size).tolist()
         )
     )
 
@@ -62,3 +183,4 @@ def lsh(M: np.ndarray, t: float, b: int = 1) -> Set[Tuple[int, int]]:
 if __name__ == "__main__":
     M = np.ones(shape=(100, 10))
     print(lsh(M, 1, 10))
+    print(band_statistics(M, 10)[0])
@@ -0,0 +1,211 @@
+import os
+import tempfile
+from typing import Dict, List, Set
+
+import numpy as np
+
+import _common  # noqa: F401, makes the common modules importable
+from binary_cache import replace_file
+from lsh import bands, hash_band
+
+
+class LSHIndex:
+    """
+    Persistent index of minhash signatures built on the banding technique of lsh. The index can be updated one document
+    at a time and queried for the documents similar to a new signature without recomputing the bands of the whole
+    collection.
+    """
+
+    def __init__(self, hash_length: int = 100, b: int = 1) -> None:
+        """
+        This function initializes an empty index.
+
+        :param hash_length: the length of the signatures stored in the index
+        :param b: number of bands
+        """
+        self.hash_length: int = hash_length
+        self.b: int = b
+        self._bands = list(bands(hash_length, b))
+        # the signatures are stored as rows, the first self._size are in use
+        self._signatures: np.ndarray = np.empty(shape=(0, hash_length), dtype=np.int64)
+        self._alive: np.ndarray = np.empty(shape=0, dtype=bool)
+        self._size: int = 0
+        self._buckets: List[Dict[int, Set[int]]] = [dict() for _ in self._bands]
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._alive[:self._size]))
+
+    def __contains__(self, document_id: int) -> bool:
+        return 0 <= document_id < self._size and bool(self._alive[document_id])
+
+    def _hash_bands(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        This function hashes every band of the given signatures.
+
+        :param signatures: matrix of shape (hash_length, documents_number) having as columns the signatures
+        :return: a matrix of shape (bands_number, documents_number) containing the hashed bands
+        """
+        return np.stack([hash_band(signatures[start:end, :]) for start, end in self._bands])
+
+    def _reserve(self, documents_number: int) -> None:
+        """
+        This function makes sure that documents_number more signatures can be stored, doubling the capacity if needed.
+
+        :param documents_number: the number of signatures to be added
+        :return: nothing
+        """
+        required = self._size + documents_number
+
+        if required > len(self._signatures):
+            capacity = max(required, 2 * len(self._signatures), 16)
+            signatures = np.empty(shape=(capacity, self.hash_length), dtype=np.int64)
+            signatures[:self._size] = self._signatures[:self._size]
+            alive = np.zeros(shape=capacity, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._signatures, self._alive = signatures, alive
+
+    def add_many(self, M: np.ndarray) -> np.ndarray:
+        """
+        This function adds the signatures of many documents to the index.
+
+        :param M: matrix of shape (hash_length, documents_number) having as columns the signatures of the documents
+        :return: the ids assigned to the documents
+        """
+        documents_number = M.shape[1]
+        self._reserve(documents_number)
+        ids = np.arange(self._size, self._size + documents_number)
+        self._signatures[ids] = M.T
+        self._alive[ids] = True
+        self._size += documents_number
+
+        for buckets, hashed_band in zip(self._buckets, self._hash_bands(M)):
+            for document_id, band_hash in zip(ids.tolist(), hashed_band.tolist()):
+                buckets.setdefault(band_hash, set()).add(document_id)
+
+        return ids
+
+    def add(self, signature: np.ndarray) -> int:
+        """
+        This function adds the signature of a document to the index.
+
+        :param signature: the minhash signature of the document
+        :return: the id assigned to the document
+        """
+        return int(self.add_many(np.asarray(signature).reshape(-1, 1))[0])
+
+    def remove(self, document_id: int) -> None:
+        """
+        This function removes a document from the index.
+
+        :param document_id: the id of the document to be removed
+        :return: nothing
+        """
+        if document_id not in self:
+            raise KeyError(document_id)
+
+        self._alive[document_id] = False
+        hashed_bands = self._hash_bands(self._signatures[document_id].reshape(-1, 1))[:, 0]
+
+        for buckets, band_hash in zip(self._buckets, hashed_bands.tolist()):
+            bucket = buckets[band_hash]
+            bucket.discard(document_id)
+
+            if not bucket:
+                del buckets[band_hash]
+
+    def signature(self, document_id: int) -> np.ndarray:
+        """
+        :param document_id: the id of a document in the index
+        :return: the minhash signature of the document
+        """
+        if document_id not in self:
+            raise KeyError(document_id)
+
+        return self._signatures[document_id]
+
+    def query(self, signature: np.ndarray, t: float) -> Set[int]:
+        """
+        This function returns the documents in the index with estimated similarity larger than t with the given
+        signature. Only the documents sharing at least one band with the signature are compared.
+
+        :param signature: the minhash signature of the query document
+        :param t: threshold for the similarity
+        :return: the ids of the similar documents
+        """
+        signature = np.asarray(signature)
+        hashed_bands = self._hash_bands(signature.reshape(-1, 1))[:, 0]
+        candidates: Set[int] = set()
+
+        for buckets, band_hash in zip(self._buckets, hashed_bands.tolist()):
+            candidates |= buckets.get(band_hash, set())
+
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = np.mean(self._signatures[candidates] == signature, axis=1)
+
+        return set(candidates[similarities >= t].tolist())
+
+    def save(self, path: str) -> None:
+        """
+        This function saves the index in the directory path. The signatures are saved as a .npy file, so that they can
+        be memory mapped when loading, while the bucket tables are saved as arrays of band hashes sorted along with
+        the ids of the documents. Each file is written to a temporary file of the directory and then moved in place,
+        so that an index loaded with memory mapped signatures can be saved to the directory it was loaded from.
+
+        :param path: the path to the directory where the index is saved
+        :return: nothing
+        """
+        os.makedirs(path, exist_ok=True)
+
+        ids = np.flatnonzero(self._alive[:self._size])
+        hashed_bands = self._hash_bands(self._signatures[ids].T).reshape(len(self._bands), -1)
+        order = np.argsort(hashed_bands, axis=1, kind='stable')
+
+        replace_file(os.path.join(path, 'signatures.npy'), lambda f: np.save(f, self._signatures[:self._size]))
+        replace_file(os.path.join(path, 'buckets.npz'), lambda f: np.savez(
+            f,
+            hash_length=self.hash_length,
+            b=self.b,
+            alive=self._alive[:self._size],
+            hashes=np.take_along_axis(hashed_bands, order, axis=1),
+            ids=ids[order]
+        ))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'LSHIndex':
+        """
+        This function loads an index saved with save.
+
+        :param path: the path to the directory where the index was saved
+        :param mmap: if true, the signatures are memory mapped instead of being read in memory
+        :return: the loaded index
+        """
+        with np.load(os.path.join(path, 'buckets.npz')) as tables:
+            index = cls(hash_length=int(tables['hash_length']), b=int(tables['b']))
+            index._alive = tables['alive']
+            hashes = tables['hashes']
+            ids = tables['ids']
+
+        index._signatures = np.load(os.path.join(path, 'signatures.npy'), mmap_mode='r' if mmap else None)
+        index._size = len(index._signatures)
+
+        for buckets, band_hashes, band_ids in zip(index._buckets, hashes, ids):
+            unique_hashes, starts = np.unique(band_hashes, return_index=True)
+            buckets.update(
+                zip(unique_hashes.tolist(), map(set, np.split(band_ids, starts[1:])))
+            )
+
+        return index
+
+
+if __name__ == "__main__":
+    index = LSHIndex(hash_length=100, b=10)
+    index.add_many(np.ones(shape=(100, 10), dtype=np.int64))
+    print(index.query(np.ones(shape=100, dtype=np.int64), 1))
+
+    # load, remove and save again in the same directory, with the signatures memory mapped
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(directory)
+        loaded = LSHIndex.load(directory)
+        loaded.remove(0)
+        loaded.save(directory)
+        print(LSHIndex.load(directory).query(np.ones(shape=100, dtype=np.int64), 1))
@@ -1,43 +1,181 @@
-from typing import Set
+from itertools import chain
+from typing import Callable, Dict, Iterable, Set, Tuple, Union
 
 import numpy as np
 
+# the hash functions are of the form (a * x + b) % MAX_VALUE
+MIN_VALUE = -2 ** 31
+MAX_VALUE = 2 ** 31 - 1
 
-def min_hash(A: Set[int], hash_length: int = 100, seed: int = 0) -> np.ndarray:
+
+def hash_parameters(hash_length: int = 100, seed: int = 0) -> np.ndarray:
     """
-    The function takes as input the set of hashed shingling in a document and returns a vector representation of the
-    document hashed through min hashing.
-    :param A: the set of hashed shingling representing a document
-    :param hash_length: the length of the signature to be returned
+    This function draws the coefficients of the hash functions used by min hashing.
+    :param hash_length: the number of hash functions to be drawn
     :param seed: the seed used to generate the hash functions
-    :return: a vector representation of the document, with len=hash_len
+    :return: a matrix of shape (hash_length, 2) containing, for each hash function, the coefficients a and b
     """
     generator = np.random.default_rng(seed=seed)
-    min_value = -2 ** 31
-    max_value = 2 ** 31 - 1
 
-    hash_parameters = generator.choice(
+    return generator.choice(
         a=generator.integers(
-            low=min_value,
-            high=max_value,
+            low=MIN_VALUE,
+            high=MAX_VALUE,
             size=hash_length * 2
         ),
         size=(hash_length, 2),
         replace=False
     )
 
+
+def min_hash(A: Set[int], hash_length: int = 100, seed: int = 0) -> np.ndarray:
+    """
+    The function takes as input the set of hashed shingling in a document and returns a vector representation of the
+    document hashed through min hashing.
+    :param A: the set of hashed shingling representing a document
+    :param hash_length: the length of the signature to be returned
+    :param seed: the seed used to generate the hash functions
+    :return: a vector representation of the document, with len=hash_len
+    """
     return np.asarray(
         [
             min(
                 map(
-                    lambda x: (x * parameters[0] + parameters[1]) % max_value,
+                    lambda x: (x * parameters[0] + parameters[1]) % MAX_VALUE,
                     A
                 )
             )
-            for parameters in hash_parameters
+            for parameters in hash_parameters(hash_length=hash_length, seed=seed)
         ]
     )
 
 
+def to_csr(documents: Iterable[Set[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function flattens a collection of shingle sets into a CSR-style representation.
+    :param documents: the sets of hashed shingling representing the documents
+    :return: the array of all the shingles and the array of shape (documents_number + 1,) of the offsets at which the
+             shingles of each document start
+    """
+    documents = list(documents)
+    offsets = np.zeros(shape=len(documents) + 1, dtype=np.int64)
+    np.cumsum([len(document) for document in documents], out=offsets[1:])
+    shingles = np.fromiter(chain.from_iterable(documents), dtype=np.int64, count=offsets[-1])
+
+    return shingles, offsets
+
+
+def min_hash_matrix(
+        documents: Union[Iterable[Set[int]], Tuple[np.ndarray, np.ndarray]],
+        hash_length: int = 100,
+        seed: int = 0,
+        chunk_size: int = 2 ** 22
+) -> np.ndarray:
+    """
+    The function computes the min hashing signatures of many documents at once. The hash functions are drawn once and
+    the minimums are computed with numpy reductions over chunks of documents, so that at most about chunk_size hashed
+    values are kept in memory at any time. For the same seed, column i is equal to min_hash(documents[i]).
+    :param documents: either the sets of hashed shingling representing the documents or a tuple (shingles, offsets) in
+                      the CSR-style format returned by to_csr
+    :param hash_length: the length of the signatures to be returned
+    :param seed: the seed used to generate the hash functions
+    :param chunk_size: the maximum number of hashed values computed at once
+    :return: the matrix of shape (hash_length, documents_number) having as columns the signatures of the documents
+    """
+    shingles, offsets = documents if isinstance(documents, tuple) else to_csr(documents)
+    shingles = np.asarray(shingles, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    documents_number = len(offsets) - 1
+
+    if np.any(np.diff(offsets) <= 0):
+        raise ValueError('min_hash_matrix() cannot compute the signature of an empty document')
+
+    parameters = hash_parameters(hash_length=hash_length, seed=seed)
+    # shape (hash_length, 1), so that they broadcast over the shingles
+    a = parameters[:, 0:1]
+    b = parameters[:, 1:2]
+
+    M = np.empty(shape=(hash_length, documents_number), dtype=np.int64)
+    shingles_per_chunk = max(1, chunk_size // hash_length)
+    start = 0
+
+    while start < documents_number:
+        # the largest block of documents fitting in the chunk, but always at least one document
+        end = max(
+            start + 1,
+            int(np.searchsorted(offsets, offsets[start] + shingles_per_chunk, side='right')) - 1
+        )
+
+        # shape (hash_length, shingles in the block)
+        hashed = (shingles[offsets[start]:offsets[end]] * a + b) % MAX_VALUE
+        M[:, start:end] = np.minimum.reduceat(hashed, offsets[start:end] - offsets[start], axis=1)
+        start = end
+
+    return M
+
+
+def one_permutation_hash_matrix(
+        documents: Union[Iterable[Set[int]], Tuple[np.ndarray, np.ndarray]],
+        hash_length: int = 100,
+        seed: int = 0
+) -> np.ndarray:
+    """
+    The function computes the signatures of many documents with one permutation hashing and optimal densification, as
+    presented in
+
+    'A. Shrivastava, Optimal Densification for Fast and Accurate Minwise Hashing, ICML'17.'
+
+    Each shingle is hashed once, and the range of the hash function is split in hash_length bins: the i-th value of a
+    signature is the minimum hashed value falling in bin i. An empty bin borrows the value of the first non empty bin
+    in a sequence of bins drawn at random for it, the same for all the documents, so that two documents agree on a
+    value with probability equal to their Jaccard similarity. The cost is linear in the number of shingles instead of
+    proportional to hash_length times the number of shingles, and the matrix has the same layout as the one of
+    min_hash_matrix, so that the two are interchangeable in lsh.
+    :param documents: either the sets of hashed shingling representing the documents or a tuple (shingles, offsets) in
+                      the CSR-style format returned by to_csr
+    :param hash_length: the length of the signatures to be returned
+    :param seed: the seed used to generate the hash function and the densification sequences
+    :return: the matrix of shape (hash_length, documents_number) having as columns the signatures of the documents
+    """
+    shingles, offsets = documents if isinstance(documents, tuple) else to_csr(documents)
+    shingles = np.asarray(shingles, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    documents_number = len(offsets) - 1
+
+    if np.any(np.diff(offsets) <= 0):
+        raise ValueError('one_permutation_hash_matrix() cannot compute the signature of an empty document')
+
+    a, b = hash_parameters(hash_length=1, seed=seed)[0]
+    hashed = (shingles * a + b) % MAX_VALUE
+    # the bins split the range of the hash function in contiguous intervals
+    hashed_bins = hashed * hash_length // MAX_VALUE
+    columns = np.repeat(np.arange(documents_number), np.diff(offsets))
+
+    # the empty bins keep the value MAX_VALUE, larger than any hashed value
+    M = np.full(shape=(hash_length, documents_number), fill_value=MAX_VALUE, dtype=np.int64)
+    np.minimum.at(M, (hashed_bins, columns), hashed)
+
+    filled = M != MAX_VALUE
+    empty_bins, empty_columns = np.nonzero(~filled)
+    generator = np.random.default_rng(seed=(seed, 1))
+
+    while len(empty_bins) > 0:
+        # the next bin of the sequence of each bin, the same for all documents
+        borrowed_bins = generator.integers(low=0, high=hash_length, size=hash_length)[empty_bins]
+        found = filled[borrowed_bins, empty_columns]
+        M[empty_bins[found], empty_columns[found]] = M[borrowed_bins[found], empty_columns[found]]
+        empty_bins, empty_columns = empty_bins[~found], empty_columns[~found]
+
+    return M
+
+
+signature_schemes: Dict[str, Callable[..., np.ndarray]] = {
+    'min_hash': min_hash_matrix,
+    'one_permutation': one_permutation_hash_matrix
+}
+
+
 if __name__ == "__main__":
     print(min_hash({1, 2, 3}))
+    print(min_hash_matrix([{1, 2, 3}, {2, 3, 4}]).shape)
+    print(one_permutation_hash_matrix([{1, 2, 3}, {2, 3, 4}]).shape)
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from lsh import band_buckets, bands, bucket_pairs, hash_band, unique_pairs, verify_pairs
+from min_hashing import signature_schemes
+from shingling import StreamingShingling
+
+
+def _signatures(
+        file: str,
+        shape: Tuple[int, int],
+        start: int,
+        documents: Sequence[str],
+        k: int,
+        seed: int,
+        scheme: str
+) -> Tuple[float, float]:
+    """
+    This function shingles and min hashes a shard of documents and writes the signatures in the columns of the memory
+    mapped signature matrix starting from start.
+
+    :return: the time spent shingling and the time spent min hashing
+    """
+    shingling_start = time.perf_counter()
+    shingles, offsets = next(StreamingShingling(k=k).batches(documents, batch_size=len(documents)))
+    min_hashing_start = time.perf_counter()
+
+    M = np.memmap(file, dtype=np.int64, mode='r+', shape=shape, order='F')
+    M[:, start:start + len(documents)] = signature_schemes[scheme]((shingles, offsets), hash_length=shape[0], seed=seed)
+    M.flush()
+
+    return min_hashing_start - shingling_start, time.perf_counter() - min_hashing_start
+
+
+def _band_pairs(file: str, shape: Tuple[int, int], start: int, end: int) -> np.ndarray:
+    """
+    This function computes the pairs of documents sharing a bucket in the band going from row start to row end of the
+    memory mapped signature matrix.
+    """
+    M = np.memmap(file, dtype=np.int64, mode='r', shape=shape, order='F')
+
+    return bucket_pairs(*band_buckets(hash_band(M[start:end, :])))
+
+
+def _verify_block(file: str, shape: Tuple[int, int], candidates: np.ndarray, t: float) -> np.ndarray:
+    """
+    This function keeps the candidate pairs of a block with estimated similarity larger than t, comparing them on the
+    memory mapped signature matrix.
+    """
+    M = np.memmap(file, dtype=np.int64, mode='r', shape=shape, order='F')
+
+    return verify_pairs(M=M, candidates=candidates, t=t)
+
+
+def find_similar_documents(
+        documents: Sequence[str],
+        t: float,
+        k: int = 5,
+        hash_length: int = 100,
+        b: int = 20,
+        seed: int = 0,
+        scheme: str = 'min_hash',
+        processes: Optional[int] = None,
+        shard_size: int = 10000,
+        verification_block_size: int = 2 ** 20,
+        directory: Optional[str] = None,
+        verbose: bool = False
+) -> Tuple[Set[Tuple[int, int]], Dict[str, float]]:
+    """
+    This function runs the whole near-duplicate detection pipeline on a process pool. The documents are split in shards
+    that are shingled and min hashed in parallel, each worker writing its signatures directly in a shared memory mapped
+    signature matrix. The bands of the matrix are then hashed in parallel, the candidate pairs of all the bands are
+    merged in this process, which is the only serial stage, and the distinct candidates are verified on the signatures
+    in parallel blocks. The empty documents have no shingles, so they are left out and appear in no pair.
+
+    :param documents: the documents to be compared
+    :param t: threshold for the similarity
+    :param k: the length of the shingles
+    :param hash_length: the length of the signatures
+    :param b: number of bands
+    :param seed: the seed used to generate the hash functions
+    :param scheme: the signature scheme, as in min_hashing.signature_schemes
+    :param processes: the number of processes of the pool, by default the number of cores
+    :param shard_size: the number of documents shingled and min hashed by each task
+    :param verification_block_size: the number of candidate pairs verified by each task
+    :param directory: the directory where the signature matrix is stored, by default a temporary directory
+    :param verbose: if true, prints information on the process
+    :return: the pairs of indices of documents with estimated similarity larger than t and the time spent in each stage
+    """
+    # the indices of the documents having some shingle, the ones shorter than k being a single shingle
+    indices = [index for index, document in enumerate(documents) if document]
+
+    if len(indices) < len(documents):
+        if verbose:
+            print(f'{len(documents) - len(indices)} empty documents left out.')
+
+        documents = [documents[index] for index in indices]
+
+    if len(documents) == 0:
+        return set(), {}
+
+    timings: Dict[str, float] = {}
+    pipeline_start = time.perf_counter()
+    shape = (hash_length, len(documents))
+
+    with tempfile.TemporaryDirectory(dir=directory) as temporary_directory, \
+            ProcessPoolExecutor(max_workers=processes) as executor:
+        file = os.path.join(temporary_directory, 'signatures.dat')
+        np.memmap(file, dtype=np.int64, mode='w+', shape=shape, order='F').flush()
+
+        stage_start = time.perf_counter()
+        shard_timings = [
+            future.result()
+            for future in [
+                executor.submit(_signatures, file, shape, start, documents[start:start + shard_size], k, seed, scheme)
+                for start in range(0, len(documents), shard_size)
+            ]
+        ]
+        timings['signatures'] = time.perf_counter() - stage_start
+        # the time spent by all the workers, which is larger than the elapsed time when running in parallel
+        timings['shingling_cpu'] = sum(shingling for shingling, _ in shard_timings)
+        timings['min_hashing_cpu'] = sum(min_hashing for _, min_hashing in shard_timings)
+
+        if verbose:
+            print(f'Signatures computed in {timings["signatures"]:.2f}s.')
+
+        stage_start = time.perf_counter()
+        band_pairs = [
+            future.result()
+            for future in [
+                executor.submit(_band_pairs, file, shape, start, end)
+                for start, end in bands(hash_length, b)
+            ]
+        ]
+        timings['banding'] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        candidates = unique_pairs(pairs=band_pairs, documents_number=len(documents))
+        del band_pairs
+        timings['merging'] = time.perf_counter() - stage_start
+
+        if verbose:
+            print(
+                f'{len(candidates)} candidate pairs found in {timings["banding"]:.2f}s and merged in '
+                f'{timings["merging"]:.2f}s.'
+            )
+
+        stage_start = time.perf_counter()
+        similar_pairs = {
+            (indices[first], indices[second])
+            for future in [
+                executor.submit(_verify_block, file, shape, candidates[start:start + verification_block_size], t)
+                for start in range(0, len(candidates), verification_block_size)
+            ]
+            for first, second in future.result().tolist()
+        }
+        timings['verification'] = time.perf_counter() - stage_start
+
+    timings['total'] = time.perf_counter() - pipeline_start
+
+    return similar_pairs, timings
+
+
+if __name__ == "__main__":
+    print(
+        find_similar_documents(
+            documents=['the quick brown fox jumps over the lazy dog'] * 3 + ['', 'lorem ipsum dolor sit amet', ''],
+            t=0.5,
+            shard_size=2
+        )
+    )
@@ -1,5 +1,10 @@
-import functools
-from typing import Set
+from typing import Iterable, Iterator, Set, Tuple, Union
+
+import numpy as np
+
+# base of the polynomial hash of the shingles and odd constant used to mix its bits, both 64 bits
+SHINGLE_HASH_BASE = np.uint64(0x100000001B3)
+SHINGLE_HASH_MIXER = np.uint64(0x9E3779B97F4A7C15)
 
 
 class Shingling:
@@ -17,7 +22,6 @@ class Shingling:
             self._shingling_number += 1
             return self._shingling_number - 1
 
-    @functools.lru_cache()
     def shingling(self, document: str, k: int) -> Set[int]:
         result = set()
         document_length = len(document)
@@ -26,3 +30,83 @@ class Shingling:
             result.add(self.hash(document[start:start + k]))
 
         return result
+
+
+class StreamingShingling:
+    """
+    Shingling which maps every shingle to an id through a 64 bits polynomial hash of its characters instead of storing
+    a vocabulary, so that the memory does not grow with the number of distinct shingles in the corpus.
+    """
+
+    def __init__(self, k: int, id_bits: int = 31) -> None:
+        """
+        :param k: the length of the shingles
+        :param id_bits: the number of bits of the ids, 31 keeps them in the domain of the hash functions of min_hash
+        """
+        self.k: int = k
+        self.id_bits: int = id_bits
+        super().__init__()
+
+    def shingling(self, document: str) -> np.ndarray:
+        """
+        This function computes the ids of all the shingles of the document. A non empty document shorter than k is
+        considered as a single shingle.
+
+        :param document: the document to be shingled
+        :return: the sorted array of the distinct shingle ids of the document
+        """
+        characters = np.frombuffer(document.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        window = min(self.k, len(characters))
+        hashes = np.zeros(shape=len(characters) - window + 1 if window > 0 else 0, dtype=np.uint64)
+
+        # hash of the window starting at i, computed for all the windows at once one character offset at a time
+        for offset in range(window):
+            hashes = hashes * SHINGLE_HASH_BASE + characters[offset:offset + len(hashes)]
+
+        return np.unique((hashes * SHINGLE_HASH_MIXER) >> np.uint64(64 - self.id_bits)).astype(np.int64)
+
+    def batches(
+            self,
+            documents: Iterable[str],
+            batch_size: int = 1024
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        This function shingles a stream of documents and groups the results in batches in the CSR-style format
+        accepted by min_hash_matrix.
+
+        :param documents: the stream of documents
+        :param batch_size: the number of documents in each batch
+        :return: an iterator over the batches, each one a tuple (shingles, offsets)
+        """
+        batch = []
+
+        for document in documents:
+            batch.append(self.shingling(document))
+
+            if len(batch) == batch_size:
+                yield _to_batch(batch)
+                batch = []
+
+        if batch:
+            yield _to_batch(batch)
+
+
+def _to_batch(shingles: Iterable[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    shingles = list(shingles)
+    offsets = np.zeros(shape=len(shingles) + 1, dtype=np.int64)
+    np.cumsum([len(document) for document in shingles], out=offsets[1:])
+
+    return np.concatenate(shingles), offsets
+
+
+def read_documents(files: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    This function lazily reads the documents from one or more files, assuming that every line of a file is a document.
+
+    :param files: the path to a file or an iterable of paths
+    :return: an iterator over the documents
+    """
+    for file in [files] if isinstance(files, str) else files:
+        with open(file, 'r') as f:
+            for line in f:
+                yield line.rstrip('\n')
@@ -1,8 +1,13 @@
-from collections import defaultdict, Counter
-from typing import Dict, List, Set, KeysView, FrozenSet
-from itertools import combinations
+from collections import defaultdict
+from typing import Callable, Dict, List, Set, Iterable, FrozenSet, Tuple, Union
+from itertools import groupby
 import numpy as np
 
+from baskets import BasketStore, load_baskets
+from candidate_trie import CandidateTrie
+from eclat import eclat
+from fp_growth import fp_growth
+
 
 def read_dataset(
         file: str
@@ -28,7 +33,7 @@ def read_dataset(
 
 
 def find_frequent_singletons(
-        baskets: List[Set[int]],
+        baskets: Union[List[Set[int]], BasketStore],
         s: int = 1,
         verbose: bool = False,
 ) -> Dict[FrozenSet[int], int]:
@@ -36,16 +41,23 @@ def find_frequent_singletons(
     This function finds all the items having a support greater than s across all the baskets.
 
     :param verbose: if set to true, prints information on the process
-    :param baskets: the list of all baskets represented as sets
+    :param baskets: the list of all baskets represented as sets, or their basket store
     :param s: the threshold support to consider an item as frequent
     :return: the set of all frequent singletons
     """
 
     item_to_support = defaultdict(int)
 
-    for basket in baskets:
-        for item in basket:
-            item_to_support[frozenset([item])] += 1
+    if isinstance(baskets, BasketStore):
+        supports = np.bincount(baskets.items)
+        items = np.flatnonzero(supports)
+        item_to_support.update(
+            zip(map(lambda item: frozenset([item]), items.tolist()), supports[items].tolist())
+        )
+    else:
+        for basket in baskets:
+            for item in basket:
+                item_to_support[frozenset([item])] += 1
 
     if verbose:
         print(
@@ -64,75 +76,135 @@ def find_frequent_singletons(
 
 
 def generate_candidate_item_sets(
-        precedent_item_sets: KeysView[FrozenSet[int]],
+        precedent_item_sets: Iterable[FrozenSet[int]],
         item_set_length: int
-) -> Set[FrozenSet[int]]:
+) -> Set[Tuple[int, ...]]:
     """
     This function returns the set of candidate new frequent itemsets for step k+1 of the a priori algorithm
-    by combining the itemsets found at step k.
+    by combining the itemsets found at step k. Two itemsets are joined only if, once sorted, they share the first k-1
+    items, and a candidate is kept only if all its subsets of length k are frequent.
 
     :param precedent_item_sets: the frequent itemsets found at time k of the algorithm
     :param item_set_length: the length of the next candidates to be returned
-    :return: a set of candidate frequent itemsets of length k+1
+    :return: a set of candidate frequent itemsets of length k+1, represented as sorted tuples
     """
-    return {
-        item_set_left | item_set_right
-        for item_set_left in precedent_item_sets
-        for item_set_right in precedent_item_sets
-        if len(item_set_left | item_set_right) == item_set_length
-    }
+    sorted_item_sets: List[Tuple[int, ...]] = sorted(tuple(sorted(item_set)) for item_set in precedent_item_sets)
+    frequent_item_sets: Set[Tuple[int, ...]] = set(sorted_item_sets)
+    candidate_item_sets: Set[Tuple[int, ...]] = set()
+
+    for prefix, item_sets in groupby(sorted_item_sets, key=lambda item_set: item_set[:item_set_length - 2]):
+        last_items = [item_set[-1] for item_set in item_sets]
+
+        for index, left_item in enumerate(last_items):
+            for right_item in last_items[index + 1:]:
+                candidate = prefix + (left_item, right_item)
+
+                # the subsets obtained by removing one of the last two items are the joined itemsets
+                if all(
+                        candidate[:position] + candidate[position + 1:] in frequent_item_sets
+                        for position in range(item_set_length - 2)
+                ):
+                    candidate_item_sets.add(candidate)
+
+    return candidate_item_sets
+
+
+def filter_baskets(
+        baskets: Union[List[Set[int]], BasketStore],
+        items: np.ndarray,
+        minimum_length: int = 1
+) -> Union[List[List[int]], BasketStore]:
+    """
+    This function removes from the baskets all the items not in items and drops the baskets left with less than
+    minimum_length items.
+
+    :param baskets: the list of all baskets represented as sets, or their basket store
+    :param items: the sorted array of items to be kept
+    :param minimum_length: the minimum number of items of the baskets to be kept
+    :return: the filtered baskets, sorted, in the same representation of baskets
+    """
+    if isinstance(baskets, BasketStore):
+        keep = np.isin(baskets.items, items)
+        lengths = np.bincount(baskets.basket_ids[keep], minlength=len(baskets))
+        long_enough = lengths >= minimum_length
+        keep[keep] = np.repeat(long_enough, lengths)
+
+        offsets = np.zeros(shape=np.count_nonzero(long_enough) + 1, dtype=np.int64)
+        np.cumsum(lengths[long_enough], out=offsets[1:])
+
+        return BasketStore(items=baskets.items[keep], offsets=offsets)
+    else:
+        items = set(items.tolist())
+
+        return [
+            sorted(filtered_basket)
+            for filtered_basket in map(lambda basket: items.intersection(basket), baskets)
+            if len(filtered_basket) >= minimum_length
+        ]
+
+
+def count_item_sets(
+        baskets: Union[List[Set[int]], BasketStore],
+        candidate_item_sets: Iterable[Tuple[int, ...]],
+        item_set_length: int
+) -> Dict[Tuple[int, ...], int]:
+    """
+    This function counts the support of the candidate itemsets with a candidate trie. The baskets are first reduced to
+    the items appearing in some candidate.
+
+    :param baskets: the list of all baskets represented as sets, or their basket store
+    :param candidate_item_sets: the itemsets to be counted, represented as sorted tuples
+    :param item_set_length: the length of the itemsets
+    :return: the dictionary of all the candidates, represented as sorted tuples, mapped to their support
+    """
+    trie = CandidateTrie(candidate_item_sets=candidate_item_sets, item_set_length=item_set_length)
+
+    for basket in filter_baskets(baskets=baskets, items=trie.items, minimum_length=item_set_length):
+        trie.count(basket)
+
+    return trie.supports()
 
 
 def filter_frequent_item_sets(
-        baskets: List[Set[int]],
-        candidate_item_sets: Set[FrozenSet[int]],
+        baskets: Union[List[Set[int]], BasketStore],
+        candidate_item_sets: Set[Tuple[int, ...]],
         item_set_length: int,
         s: int = 1
 ) -> Dict[FrozenSet[int], int]:
     """
     This function finds all the itemsets having a support greater than s across all the baskets.
 
-    :param baskets: the list of all baskets represented as sets
-    :param candidate_item_sets: the set of itemsets candidate to be frequent
+    :param baskets: the list of all baskets represented as sets, or their basket store
+    :param candidate_item_sets: the set of itemsets candidate to be frequent, represented as sorted tuples
     :param item_set_length: the length of the itemsets
     :param s: the threshold support to consider an itemset as frequent
     :return: the set of all frequent itemsets
     """
-    item_set_to_support = Counter(
-        [
-            frozenset(item_set)
-            for basket in baskets
-            for item_set in combinations(basket, item_set_length)
-            if frozenset(item_set) in candidate_item_sets
-        ]
-    )
-
-    return dict(
-        filter(
-            lambda element: element[1] > s,
-            item_set_to_support.items()
-        )
-    )
+    return {
+        frozenset(item_set): support
+        for item_set, support in count_item_sets(
+            baskets=baskets,
+            candidate_item_sets=candidate_item_sets,
+            item_set_length=item_set_length
+        ).items()
+        if support > s
+    }
 
 
-def find_frequent_item_sets(
-        file: str,
+def a_priori(
+        baskets: Union[List[Set[int]], BasketStore],
         s: int = 1,
-        verbose: bool = False,
+        verbose: bool = False
 ) -> Dict[FrozenSet[int], int]:
     """
-    This function reads from a file .dat assuming that on every row of the file there is a basket of items.
-    The function then generates the set of frequent itemsets having support greater or equal than s and maximum size
-    equal to maximum_item_set_size with the apriori algorithm.
+    This function generates the set of frequent itemsets having support greater than s with the apriori algorithm.
 
-    :param verbose:  if set to true, prints information on the process
-    :param file: the path to the input file
-    :param s: the minimum support required to consider an itemset frequent
+    :param baskets: the list of all baskets represented as sets, or their basket store
+    :param s: the threshold support to consider an itemset as frequent
+    :param verbose: if set to true, prints information on the process
     :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
     """
 
-    baskets = read_dataset(file=file)
-
     # The first frequent itemsets are the frequent singletons themselves
     frequent_item_sets: Dict[FrozenSet[int], int] = find_frequent_singletons(
         baskets=baskets, s=s, verbose=verbose)
@@ -160,22 +232,58 @@ def find_frequent_item_sets(
                 "{} candidates generated!".format(len(candidate_item_sets))
             )
 
-        if len(candidate_item_sets) > 0:
-            new_frequent_item_sets = filter_frequent_item_sets(
-                baskets=baskets,
-                candidate_item_sets=candidate_item_sets,
-                item_set_length=item_set_length,
-                s=s
+        if len(candidate_item_sets) == 0:
+            break
+
+        new_frequent_item_sets = filter_frequent_item_sets(
+            baskets=baskets,
+            candidate_item_sets=candidate_item_sets,
+            item_set_length=item_set_length,
+            s=s
+        )
+
+        frequent_item_sets.update(new_frequent_item_sets)
+        precedent_frequent_item_sets = new_frequent_item_sets.keys()
+        item_set_length += 1
+
+        if verbose:
+            print(
+                f'Done! {len(new_frequent_item_sets)} frequent items was/were found.'
             )
 
-            frequent_item_sets.update(new_frequent_item_sets)
-            precedent_frequent_item_sets = new_frequent_item_sets.keys()
-            item_set_length += 1
+    return frequent_item_sets
+
+
+mining_algorithms: Dict[str, Callable[..., Dict[FrozenSet[int], int]]] = {
+    'a_priori': a_priori,
+    'fp_growth': fp_growth,
+    'eclat': eclat
+}
+
+
+def find_frequent_item_sets(
+        file: str,
+        s: int = 1,
+        verbose: bool = False,
+        cache: bool = False,
+        algorithm: str = 'a_priori'
+) -> Dict[FrozenSet[int], int]:
+    """
+    This function reads from a file .dat assuming that on every row of the file there is a basket of items.
+    The function then generates the set of frequent itemsets having support greater than s with the selected
+    algorithm, the apriori algorithm by default.
+
+    :param verbose:  if set to true, prints information on the process
+    :param file: the path to the input file
+    :param s: the minimum support required to consider an itemset frequent
+    :param cache: if true, the baskets are memory mapped from a binary cache of the file, see load_baskets
+    :param algorithm: either a_priori, fp_growth or eclat, determines the mining algorithm
+    :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+    """
+
+    baskets = load_baskets(file=file, cache=cache)
 
-            if verbose:
-                print(
-                    f'Done! {len(new_frequent_item_sets)} frequent items was/were found.'
-                )
+    frequent_item_sets = mining_algorithms[algorithm](baskets=baskets, s=s, verbose=verbose)
 
     if verbose:
         print(
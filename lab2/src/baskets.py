@@ -0,0 +1,154 @@
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+import _common  # noqa: F401, makes the common modules importable
+from binary_cache import load_cached_arrays
+
+
+class BasketStore:
+    """
+    Compact representation of a list of baskets as two flat arrays, in CSR-style: items contains the items of all the
+    baskets one after the other, sorted and without repetitions inside each basket, and offsets[i] is the position in
+    items where basket i starts.
+    """
+
+    def __init__(self, items: np.ndarray, offsets: np.ndarray) -> None:
+        """
+        :param items: the items of all the baskets
+        :param offsets: the array of shape (baskets_number + 1,) of the positions where each basket starts
+        """
+        self.items: np.ndarray = items
+        self.offsets: np.ndarray = offsets
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.items[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[List[int]]:
+        items = self.items.tolist()
+        offsets = self.offsets.tolist()
+
+        for start, end in zip(offsets, offsets[1:]):
+            yield items[start:end]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def basket_ids(self) -> np.ndarray:
+        """
+        :return: an array of the same shape of items containing the index of the basket of each item
+        """
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+
+def _from_lists(baskets: List[list]) -> BasketStore:
+    """
+    This function builds a basket store from the baskets represented as lists, removing the repeated items in a basket.
+
+    :param baskets: the baskets, each one a list of items as integers or strings
+    :return: the basket store of the baskets
+    """
+    lengths = np.fromiter(map(len, baskets), dtype=np.int64, count=len(baskets))
+    items = np.fromiter(map(int, chain.from_iterable(baskets)), dtype=np.int64, count=int(lengths.sum()))
+    basket_ids = np.repeat(np.arange(len(baskets)), lengths)
+
+    order = np.lexsort((items, basket_ids))
+    items, basket_ids = items[order], basket_ids[order]
+    keep = np.ones(shape=len(items), dtype=bool)
+    keep[1:] = (items[1:] != items[:-1]) | (basket_ids[1:] != basket_ids[:-1])
+
+    offsets = np.zeros(shape=len(baskets) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(basket_ids[keep], minlength=len(baskets)), out=offsets[1:])
+
+    return BasketStore(items=items[keep], offsets=offsets)
+
+
+def from_baskets(baskets: Iterable[Iterable[int]]) -> BasketStore:
+    """
+    This function builds the basket store of baskets kept in memory, for instance the list returned by read_dataset.
+
+    :param baskets: the baskets, each one an iterable of items
+    :return: the basket store of the baskets
+    """
+    return _from_lists([list(basket) for basket in baskets])
+
+
+def concatenate(stores: List[BasketStore]) -> BasketStore:
+    """
+    This function concatenates the baskets of many basket stores.
+
+    :param stores: the basket stores to be concatenated
+    :return: a basket store containing all the baskets, in order
+    """
+    offsets = [np.zeros(shape=1, dtype=np.int64)]
+
+    for store in stores:
+        offsets.append(store.offsets[1:] + offsets[-1][-1])
+
+    return BasketStore(
+        items=np.concatenate([np.empty(shape=0, dtype=np.int64)] + [store.items for store in stores]),
+        offsets=np.concatenate(offsets)
+    )
+
+
+def iter_baskets(file: str, chunk_size: int = 2 ** 22) -> Iterator[BasketStore]:
+    """
+    This function reads a .dat file, where every row is a basket of items, in chunks of about chunk_size bytes.
+
+    :param file: the path to the input file
+    :param chunk_size: the approximate number of bytes read for each chunk
+    :return: an iterator over the basket stores of the chunks
+    """
+    with open(file, 'r') as f:
+        while True:
+            lines = f.readlines(chunk_size)
+
+            if not lines:
+                break
+
+            yield _from_lists([line.split() for line in lines])
+
+
+def load_baskets(
+        file: str,
+        cache: bool = False,
+        cache_directory: Optional[str] = None,
+        chunk_size: int = 2 ** 22
+) -> BasketStore:
+    """
+    This function reads a .dat file, where every row is a basket of items, into a basket store. If cache is true, the
+    arrays of the store are saved in binary format and memory mapped on later calls, until the file is modified, see
+    binary_cache.load_cached_arrays.
+
+    :param file: the path to the input file
+    :param cache: if true, uses a binary cache of the file
+    :param cache_directory: the directory of the cache, by default the directory of the file
+    :param chunk_size: the approximate number of bytes parsed at once
+    :return: the basket store of the file
+    """
+    if not cache:
+        return concatenate(list(iter_baskets(file=file, chunk_size=chunk_size)))
+
+    def compute() -> Dict[str, np.ndarray]:
+        store = concatenate(list(iter_baskets(file=file, chunk_size=chunk_size)))
+
+        return {'items': store.items, 'offsets': store.offsets}
+
+    arrays = load_cached_arrays(
+        file=file, names=('items', 'offsets'), compute=compute, cache_directory=cache_directory
+    )
+
+    return BasketStore(items=arrays['items'], offsets=arrays['offsets'])
+
+
+if __name__ == "__main__":
+    baskets = load_baskets(file='../data/T10I4D100K.dat')
+
+    print(f'{len(baskets)} baskets containing {len(baskets.items)} items.')
@@ -0,0 +1,51 @@
+import time
+from typing import Dict, Iterable, List
+
+from a_priori import mining_algorithms
+from baskets import load_baskets
+
+
+def benchmark_mining_algorithms(
+        file: str,
+        supports: Iterable[int],
+        algorithms: Iterable[str] = ('a_priori', 'fp_growth', 'eclat')
+) -> Dict[str, List[float]]:
+    """
+    This function measures the execution time of the mining algorithms on the same baskets at several support
+    thresholds, and checks that all of them find the same frequent itemsets.
+
+    :param file: the path to the input file
+    :param supports: the support thresholds
+    :param algorithms: the names of the algorithms, as in mining_algorithms
+    :return: a dictionary linking each algorithm to its execution times, one per support threshold
+    """
+    baskets = load_baskets(file=file)
+    supports = list(supports)
+    algorithms = list(algorithms)
+    durations: Dict[str, List[float]] = {algorithm: [] for algorithm in algorithms}
+
+    print(f'{"support":>8} {"itemsets":>9}' + ''.join(f'{algorithm:>12}' for algorithm in algorithms))
+
+    for s in supports:
+        results = []
+
+        for algorithm in algorithms:
+            start = time.perf_counter()
+            results.append(mining_algorithms[algorithm](baskets=baskets, s=s))
+            durations[algorithm].append(time.perf_counter() - start)
+
+        if any(result != results[0] for result in results[1:]):
+            raise RuntimeError(f'The algorithms disagree on the frequent itemsets with support {s}.')
+
+        print(
+            f'{s:>8} {len(results[0]):>9}' + ''.join(f'{durations[algorithm][-1]:>11.2f}s' for algorithm in algorithms)
+        )
+
+    return durations
+
+
+if __name__ == "__main__":
+    benchmark_mining_algorithms(
+        file='../data/T10I4D100K.dat',
+        supports=[2000, 1000, 500, 250, 100]
+    )
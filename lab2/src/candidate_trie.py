@@ -0,0 +1,75 @@
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class CandidateTrie:
+    """
+    Prefix tree of candidate itemsets of the same length, used to count their support. Each candidate is a path of
+    sorted items from the root to a leaf, and counting a basket only follows the paths matching its items, so that
+    the cost is bounded by the candidates contained in the basket rather than by all its combinations.
+    """
+
+    def __init__(self, candidate_item_sets: Iterable[Tuple[int, ...]], item_set_length: int) -> None:
+        """
+        This function builds the trie of the candidates, with all the counters set to zero.
+
+        :param candidate_item_sets: the candidates, represented as sorted tuples
+        :param item_set_length: the length of the candidates
+        """
+        self.item_set_length: int = item_set_length
+        self.candidate_item_sets: List[Tuple[int, ...]] = list(candidate_item_sets)
+        self.counts: List[int] = [0] * len(self.candidate_item_sets)
+        # inner nodes map an item to the next node, the last level maps an item to the index of the candidate
+        self._root: Dict[int, Union[dict, int]] = {}
+
+        for index, item_set in enumerate(self.candidate_item_sets):
+            node = self._root
+
+            for item in item_set[:-1]:
+                node = node.setdefault(item, {})
+
+            node[item_set[-1]] = index
+
+        super().__init__()
+
+    @property
+    def items(self) -> np.ndarray:
+        """
+        :return: the sorted array of the items appearing in at least one candidate
+        """
+        return np.unique(
+            np.fromiter((item for item_set in self.candidate_item_sets for item in item_set), dtype=np.int64)
+        )
+
+    def _count(self, node: Dict[int, Union[dict, int]], basket: Sequence[int], start: int, depth: int) -> None:
+        last = len(basket) - (self.item_set_length - depth) + 1
+
+        if depth == self.item_set_length - 1:
+            for item in basket[start:last]:
+                index = node.get(item)
+
+                if index is not None:
+                    self.counts[index] += 1
+        else:
+            for position in range(start, last):
+                child = node.get(basket[position])
+
+                if child is not None:
+                    self._count(child, basket, position + 1, depth + 1)
+
+    def count(self, basket: Sequence[int]) -> None:
+        """
+        This function increments the counters of all the candidates contained in the basket.
+
+        :param basket: the sorted items of the basket
+        :return: nothing
+        """
+        if len(basket) >= self.item_set_length:
+            self._count(self._root, basket, 0, 0)
+
+    def supports(self) -> Dict[Tuple[int, ...], int]:
+        """
+        :return: the dictionary of the candidates mapped to their support
+        """
+        return dict(zip(self.candidate_item_sets, self.counts))
@@ -0,0 +1,92 @@
+from typing import Dict, FrozenSet, List, Set, Union
+
+import numpy as np
+
+import _common  # noqa: F401, makes the common modules importable
+from baskets import BasketStore, from_baskets
+from bits import popcount_rows
+
+
+def _mine(
+        prefix: FrozenSet[int],
+        items: np.ndarray,
+        bitsets: np.ndarray,
+        s: int,
+        frequent_item_sets: Dict[FrozenSet[int], int]
+) -> None:
+    """
+    This function adds to frequent_item_sets all the frequent itemsets made of prefix and the given items, exploring the
+    equivalence class of prefix depth first.
+
+    :param prefix: the itemset shared by the class
+    :param items: the items extending prefix to a frequent itemset
+    :param bitsets: a matrix containing the packed bitset of the baskets containing prefix and each of items
+    :param s: the threshold support to consider an itemset as frequent
+    :param frequent_item_sets: the dictionary where the frequent itemsets are added
+    :return: nothing
+    """
+    for index in range(len(items) - 1):
+        # the intersections with all the following items are computed at once
+        intersections = bitsets[index + 1:] & bitsets[index]
+        supports = popcount_rows(intersections)
+        frequent = supports > s
+
+        if not np.any(frequent):
+            continue
+
+        item_set = prefix | {int(items[index])}
+
+        for item, support in zip(items[index + 1:][frequent].tolist(), supports[frequent].tolist()):
+            frequent_item_sets[item_set | {item}] = support
+
+        _mine(item_set, items[index + 1:][frequent], intersections[frequent], s, frequent_item_sets)
+
+
+def eclat(
+        baskets: Union[List[Set[int]], BasketStore],
+        s: int = 1,
+        verbose: bool = False
+) -> Dict[FrozenSet[int], int]:
+    """
+    This function finds all the itemsets having a support greater than s with the Eclat algorithm presented in
+
+    'M. J. Zaki, Scalable Algorithms for Association Mining, IEEE TKDE 12(3), 2000.'
+
+    Each frequent item is represented vertically by the bitset of the baskets containing it, packed in 64 bits words,
+    and the support of an itemset is the number of bits set in the intersection of the bitsets of its items.
+
+    :param baskets: the list of all baskets represented as sets, or their basket store
+    :param s: the threshold support to consider an itemset as frequent
+    :param verbose: if set to true, prints information on the process
+    :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+    """
+    if not isinstance(baskets, BasketStore):
+        baskets = from_baskets(baskets)
+
+    supports = np.bincount(baskets.items)
+    items = np.flatnonzero(supports > s)
+
+    if verbose:
+        print(f'Building the bitsets of {len(items)} frequent items over {len(baskets)} baskets...')
+
+    # row of each frequent item in the bitset matrix, -1 for the infrequent ones
+    rows = np.full(shape=len(supports), fill_value=-1, dtype=np.int64)
+    rows[items] = np.arange(len(items))
+    item_rows = rows[baskets.items]
+    occurrences = item_rows >= 0
+
+    # basket i is bit i % 64 of word i // 64, the words being set directly to avoid an unpacked matrix of bits
+    basket_ids = baskets.basket_ids[occurrences].astype(np.uint64)
+    bitsets = np.zeros(shape=(len(items), -(-len(baskets) // 64)), dtype=np.uint64)
+    np.bitwise_or.at(
+        bitsets,
+        (item_rows[occurrences], (basket_ids >> np.uint64(6)).astype(np.int64)),
+        np.uint64(1) << (basket_ids & np.uint64(63))
+    )
+
+    frequent_item_sets: Dict[FrozenSet[int], int] = {
+        frozenset([item]): support for item, support in zip(items.tolist(), supports[items].tolist())
+    }
+    _mine(frozenset(), items, bitsets, s, frequent_item_sets)
+
+    return frequent_item_sets
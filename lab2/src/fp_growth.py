@@ -0,0 +1,119 @@
+from collections import Counter, defaultdict
+from typing import DefaultDict, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+from baskets import BasketStore
+
+
+class _FPNode:
+    __slots__ = ('item', 'count', 'parent', 'children')
+
+    def __init__(self, item: Optional[int], parent: Optional['_FPNode']) -> None:
+        self.item: Optional[int] = item
+        self.count: int = 0
+        self.parent: Optional['_FPNode'] = parent
+        self.children: Dict[int, '_FPNode'] = {}
+
+
+def _build_tree(
+        transactions: Iterable[Tuple[Tuple[int, ...], int]],
+        s: int
+) -> Tuple[Dict[int, List[_FPNode]], Dict[int, int]]:
+    """
+    This function builds the FP-tree of weighted transactions, keeping only the items having support greater than s.
+
+    :param transactions: the transactions, each one a tuple of items with its multiplicity
+    :param s: the threshold support to consider an item as frequent
+    :return: the header table, linking each frequent item to its nodes in the tree, and the support of the items
+    """
+    transactions = list(transactions)
+    item_to_support: DefaultDict[int, int] = defaultdict(int)
+
+    for transaction, count in transactions:
+        for item in transaction:
+            item_to_support[item] += count
+
+    item_to_support = {item: support for item, support in item_to_support.items() if support > s}
+    # the items are inserted in order of decreasing support, to share as many prefixes as possible
+    rank = {
+        item: index
+        for index, item in enumerate(sorted(item_to_support, key=lambda item: (-item_to_support[item], item)))
+    }
+
+    root = _FPNode(item=None, parent=None)
+    header: Dict[int, List[_FPNode]] = defaultdict(list)
+
+    for transaction, count in transactions:
+        node = root
+
+        for item in sorted(filter(lambda item: item in rank, transaction), key=rank.__getitem__):
+            child = node.children.get(item)
+
+            if child is None:
+                child = node.children[item] = _FPNode(item=item, parent=node)
+                header[item].append(child)
+
+            child.count += count
+            node = child
+
+    return header, item_to_support
+
+
+def _mine(
+        transactions: Iterable[Tuple[Tuple[int, ...], int]],
+        s: int,
+        suffix: FrozenSet[int],
+        frequent_item_sets: Dict[FrozenSet[int], int]
+) -> None:
+    """
+    This function adds to frequent_item_sets all the frequent itemsets of the transactions extended with suffix,
+    mining the conditional pattern base of each frequent item recursively.
+    """
+    header, item_to_support = _build_tree(transactions=transactions, s=s)
+
+    for item, nodes in header.items():
+        item_set = suffix | {item}
+        frequent_item_sets[item_set] = item_to_support[item]
+        conditional_pattern_base = []
+
+        for node in nodes:
+            path = []
+            ancestor = node.parent
+
+            while ancestor.item is not None:
+                path.append(ancestor.item)
+                ancestor = ancestor.parent
+
+            if path:
+                conditional_pattern_base.append((tuple(path), node.count))
+
+        if conditional_pattern_base:
+            _mine(conditional_pattern_base, s, item_set, frequent_item_sets)
+
+
+def fp_growth(
+        baskets: Union[List[Set[int]], BasketStore],
+        s: int = 1,
+        verbose: bool = False
+) -> Dict[FrozenSet[int], int]:
+    """
+    This function finds all the itemsets having a support greater than s with the FP-Growth algorithm presented in
+
+    'J. Han, J. Pei, and Y. Yin, Mining Frequent Patterns without Candidate Generation, SIGMOD'00.'
+
+    The baskets are compressed in a prefix tree, which is then mined recursively without generating candidates.
+
+    :param baskets: the list of all baskets represented as sets, or their basket store
+    :param s: the threshold support to consider an itemset as frequent
+    :param verbose: if set to true, prints information on the process
+    :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+    """
+    # identical baskets are inserted in the tree only once
+    transactions = Counter(tuple(basket) for basket in baskets)
+
+    if verbose:
+        print(f'Mining {len(transactions)} distinct baskets with FP-Growth...')
+
+    frequent_item_sets: Dict[FrozenSet[int], int] = {}
+    _mine(transactions.items(), s, frozenset(), frequent_item_sets)
+
+    return frequent_item_sets
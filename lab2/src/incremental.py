@@ -0,0 +1,178 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict, FrozenSet, List, Set, Tuple, Union
+
+import numpy as np
+
+from a_priori import count_item_sets, find_frequent_item_sets, generate_candidate_item_sets
+from baskets import BasketStore, from_baskets, iter_baskets, load_baskets
+
+
+class IncrementalMiner:
+    """
+    This class maintains the frequent itemsets of a growing list of baskets with the algorithm presented in
+
+    'D. W. Cheung, J. Han, V. T. Ng, and C. Y. Wong, Maintenance of Discovered Association Rules in Large Databases:
+    An Incremental Updating Technique, ICDE'96.'
+
+    extended with the negative border, the itemsets which are not frequent but whose subsets are all frequent. The
+    supports of the frequent itemsets and of the negative border are kept, so that when new baskets are appended only
+    the new baskets are scanned to update them. The old baskets are scanned again only to count the itemsets that
+    become candidates because some of their subsets became frequent.
+    """
+
+    def __init__(self, s: float = 1, relative: bool = False, verbose: bool = False) -> None:
+        """
+        :param s: the threshold support to consider an itemset as frequent
+        :param relative: if true, s is a fraction of the number of baskets, otherwise a number of baskets
+        :param verbose: if set to true, prints information on the process
+        """
+        self.s: float = s
+        self.relative: bool = relative
+        self.verbose: bool = verbose
+        self.stores: List[BasketStore] = []
+        self.item_supports: np.ndarray = np.zeros(shape=0, dtype=np.int64)
+        # the supports of the frequent itemsets of length at least two and of their negative border
+        self.supports: Dict[Tuple[int, ...], int] = {}
+        self.frequent_item_sets: Dict[FrozenSet[int], int] = {}
+        super().__init__()
+
+    @property
+    def baskets_number(self) -> int:
+        return sum(map(len, self.stores))
+
+    @property
+    def threshold(self) -> float:
+        """
+        :return: the support an itemset must exceed to be frequent
+        """
+        return self.s * self.baskets_number if self.relative else self.s
+
+    @property
+    def negative_border(self) -> Dict[FrozenSet[int], int]:
+        """
+        :return: the itemsets which are not frequent but whose subsets are all frequent, mapped to their support
+        """
+        threshold = self.threshold
+        items = np.flatnonzero((self.item_supports > 0) & (self.item_supports <= threshold))
+        negative_border = {
+            frozenset([item]): support for item, support in zip(items.tolist(), self.item_supports[items].tolist())
+        }
+        negative_border.update(
+            (frozenset(item_set), support) for item_set, support in self.supports.items() if support <= threshold
+        )
+
+        return negative_border
+
+    def _count(
+            self,
+            stores: List[BasketStore],
+            candidate_item_sets: Set[Tuple[int, ...]],
+            item_set_length: int
+    ) -> Dict[Tuple[int, ...], int]:
+        """
+        This function counts the support of the candidate itemsets of the same length over the given basket stores.
+        """
+        item_set_to_support: DefaultDict[Tuple[int, ...], int] = defaultdict(int)
+
+        for store in stores:
+            for item_set, support in count_item_sets(
+                    baskets=store,
+                    candidate_item_sets=candidate_item_sets,
+                    item_set_length=item_set_length
+            ).items():
+                item_set_to_support[item_set] += support
+
+        return item_set_to_support
+
+    def update(self, baskets: Union[List[Set[int]], BasketStore]) -> Dict[FrozenSet[int], int]:
+        """
+        This function appends new baskets and updates the frequent itemsets. The supports of the frequent itemsets
+        and of the negative border are updated by scanning only the new baskets. Then the frequent itemsets are
+        generated level-wise as in the apriori algorithm, and the candidates whose support is not known, because they
+        were neither frequent nor in the negative border, are counted over all the baskets.
+
+        :param baskets: the new baskets, as a list of sets or as a basket store
+        :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+        """
+        if not isinstance(baskets, BasketStore):
+            baskets = from_baskets(baskets)
+
+        new_item_supports = np.bincount(baskets.items)
+        self.item_supports = np.pad(self.item_supports, (0, max(0, len(new_item_supports) - len(self.item_supports))))
+        self.item_supports[:len(new_item_supports)] += new_item_supports
+
+        item_sets_by_length: DefaultDict[int, Set[Tuple[int, ...]]] = defaultdict(set)
+
+        for item_set in self.supports:
+            item_sets_by_length[len(item_set)].add(item_set)
+
+        for item_set_length, item_sets in item_sets_by_length.items():
+            for item_set, support in self._count([baskets], item_sets, item_set_length).items():
+                self.supports[item_set] += support
+
+        self.stores.append(baskets)
+        threshold = self.threshold
+        items = np.flatnonzero(self.item_supports > threshold)
+        frequent_item_sets: Dict[FrozenSet[int], int] = {
+            frozenset([item]): support for item, support in zip(items.tolist(), self.item_supports[items].tolist())
+        }
+        supports: Dict[Tuple[int, ...], int] = {}
+        precedent_frequent_item_sets = frequent_item_sets.keys()
+        item_set_length = 2
+        rescanned = 0
+
+        while len(precedent_frequent_item_sets) > 1:
+            candidate_item_sets = generate_candidate_item_sets(
+                precedent_item_sets=precedent_frequent_item_sets,
+                item_set_length=item_set_length
+            )
+
+            if len(candidate_item_sets) == 0:
+                break
+
+            unknown_item_sets = candidate_item_sets.difference(self.supports)
+
+            if unknown_item_sets:
+                rescanned += len(unknown_item_sets)
+                self.supports.update(self._count(self.stores, unknown_item_sets, item_set_length))
+
+            supports.update((item_set, self.supports.get(item_set, 0)) for item_set in candidate_item_sets)
+            new_frequent_item_sets = {
+                frozenset(item_set): supports[item_set]
+                for item_set in candidate_item_sets
+                if supports[item_set] > threshold
+            }
+            frequent_item_sets.update(new_frequent_item_sets)
+            precedent_frequent_item_sets = new_frequent_item_sets.keys()
+            item_set_length += 1
+
+        # only the frequent itemsets and the negative border are kept
+        self.supports = supports
+        self.frequent_item_sets = frequent_item_sets
+
+        if self.verbose:
+            print(
+                f'{len(baskets)} baskets added, {rescanned} itemsets counted over all the {self.baskets_number} '
+                f'baskets, {len(frequent_item_sets)} frequent itemsets.'
+            )
+
+        return frequent_item_sets
+
+    def update_from_file(self, file: str, cache: bool = False) -> Dict[FrozenSet[int], int]:
+        """
+        This function appends the baskets of a .dat file, see update.
+
+        :param file: the path to the input file
+        :param cache: if true, the baskets are memory mapped from a binary cache of the file, see load_baskets
+        :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+        """
+        return self.update(load_baskets(file=file, cache=cache))
+
+
+if __name__ == "__main__":
+    miner = IncrementalMiner(s=0.01, relative=True, verbose=True)
+
+    for chunk in iter_baskets(file='../data/T10I4D100K.dat', chunk_size=2 ** 20):
+        miner.update(chunk)
+
+    print(miner.frequent_item_sets == find_frequent_item_sets(file='../data/T10I4D100K.dat', s=miner.threshold))
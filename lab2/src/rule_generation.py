@@ -1,6 +1,87 @@
+import heapq
 from collections import defaultdict
 from itertools import combinations
-from typing import Dict, Set, FrozenSet
+from typing import Dict, FrozenSet, Iterator, List, Set, Tuple
+
+import numpy as np
+
+# an association rule as (antecedent, consequent, support, confidence)
+Rule = Tuple[FrozenSet[int], FrozenSet[int], int, float]
+
+rule_dtype = np.dtype([
+    ('antecedent', object),
+    ('consequent', object),
+    ('support', np.int64),
+    ('confidence', np.float64),
+    ('lift', np.float64)
+])
+
+
+def _grow_consequents(consequents: List[Tuple[int, ...]]) -> List[Tuple[int, ...]]:
+    """
+    This function joins the sorted consequents of the same length sharing all but the last item, keeping only the new
+    consequents whose subsets are all among consequents.
+
+    :param consequents: the consequents, as sorted tuples in lexicographic order
+    :return: the consequents one item longer, as sorted tuples in lexicographic order
+    """
+    confident_consequents = set(consequents)
+    grown_consequents = []
+
+    for index, left in enumerate(consequents):
+        for right in consequents[index + 1:]:
+            if left[:-1] != right[:-1]:
+                break
+
+            candidate = left + right[-1:]
+
+            if all(
+                    candidate[:position] + candidate[position + 1:] in confident_consequents
+                    for position in range(len(candidate) - 2)
+            ):
+                grown_consequents.append(candidate)
+
+    return grown_consequents
+
+
+def iterate_rules(
+        frequent_item_sets: Dict[FrozenSet[int], int],
+        c: float = 0.1
+) -> Iterator[Rule]:
+    """
+    This function lazily generates all the association rules having confidence greater or equal than c. For each
+    itemset, the consequents are grown one item at a time and only from the consequents of rules having enough
+    confidence: moving an item from the antecedent to the consequent can only lower the confidence, so the larger
+    consequents of a rejected rule are never considered.
+
+    :param frequent_item_sets: the dictionary of all frequent itemsets with their respective support
+    :param c: the threshold confidence
+    :return: an iterator over the rules, as tuples (antecedent, consequent, support, confidence)
+    """
+    for item_set, support in frequent_item_sets.items():
+        items = sorted(item_set)
+        consequents = [(item,) for item in items]
+        consequent_length = 1
+        # true as long as no rule of the itemset has been rejected, so that all the consequents are to be tested
+        complete = True
+
+        while consequents and consequent_length < len(item_set):
+            confident_consequents = []
+
+            for consequent in consequents:
+                antecedent = item_set.difference(consequent)
+                confidence = support / frequent_item_sets[antecedent]
+
+                if confidence >= c:
+                    confident_consequents.append(consequent)
+                    yield antecedent, frozenset(consequent), support, confidence
+
+            complete = complete and len(confident_consequents) == len(consequents)
+            consequent_length += 1
+            consequents = (
+                list(combinations(items, consequent_length)) if complete
+                else _grow_consequents(confident_consequents)
+            )
 
 
 def generate_rules(
@@ -17,18 +98,89 @@ def generate_rules(
 
     association_rules: Dict[FrozenSet[int], Set[FrozenSet[int]]] = defaultdict(set)
 
-    for item_set in filter(lambda x: len(x) > 1, frequent_item_sets.keys()):
-        for antecedent_length in range(1, len(item_set)):
-            for antecedent in [frozenset(combination) for combination in combinations(item_set, antecedent_length)]:
-                confidence = frequent_item_sets[item_set] / frequent_item_sets[antecedent]
-
-                if confidence >= c:
-                    consequent = item_set - antecedent
-                    association_rules[antecedent].add(consequent)
+    for antecedent, consequent, _, _ in iterate_rules(frequent_item_sets=frequent_item_sets, c=c):
+        association_rules[antecedent].add(consequent)
 
     return association_rules
 
 
+def _lift(
+        frequent_item_sets: Dict[FrozenSet[int], int],
+        rule: Rule,
+        baskets_number: int
+) -> float:
+    _, consequent, _, confidence = rule
+
+    return confidence * baskets_number / frequent_item_sets[consequent]
+
+
+def generate_rule_table(
+        frequent_item_sets: Dict[FrozenSet[int], int],
+        baskets_number: int,
+        c: float = 0.1,
+        min_lift: float = 0.0
+) -> np.ndarray:
+    """
+    This function returns all the association rules having confidence greater or equal than c and lift greater or
+    equal than min_lift as a structured array.
+
+    :param frequent_item_sets: the dictionary of all frequent itemsets with their respective support
+    :param baskets_number: the number of baskets the itemsets were mined from, needed for the lift
+    :param c: the threshold confidence
+    :param min_lift: the threshold lift
+    :return: a structured array of dtype rule_dtype, with columns antecedent, consequent, support, confidence and lift
+    """
+    rules: List[tuple] = []
+
+    for rule in iterate_rules(frequent_item_sets=frequent_item_sets, c=c):
+        lift = _lift(frequent_item_sets=frequent_item_sets, rule=rule, baskets_number=baskets_number)
+
+        if lift >= min_lift:
+            rules.append(rule + (lift,))
+
+    table = np.empty(shape=len(rules), dtype=rule_dtype)
+    table[:] = rules
+
+    return table
+
+
+def top_k_rules(
+        frequent_item_sets: Dict[FrozenSet[int], int],
+        baskets_number: int,
+        k: int = 10,
+        c: float = 0.1,
+        min_lift: float = 0.0,
+        key: str = 'lift'
+) -> np.ndarray:
+    """
+    This function returns the k best association rules having confidence greater or equal than c and lift greater or
+    equal than min_lift. The rules are streamed through a heap of size k, so that they are never all materialized.
+
+    :param frequent_item_sets: the dictionary of all frequent itemsets with their respective support
+    :param baskets_number: the number of baskets the itemsets were mined from, needed for the lift
+    :param k: the number of rules to be returned
+    :param c: the threshold confidence
+    :param min_lift: the threshold lift
+    :param key: either support, confidence or lift, the column used to rank the rules
+    :return: a structured array of dtype rule_dtype containing the best rules, in decreasing order of key
+    """
+    column = rule_dtype.names.index(key)
+    rules = (
+        rule + (_lift(frequent_item_sets=frequent_item_sets, rule=rule, baskets_number=baskets_number),)
+        for rule in iterate_rules(frequent_item_sets=frequent_item_sets, c=c)
+    )
+    best_rules: List[tuple] = heapq.nlargest(
+        k,
+        filter(lambda rule: rule[-1] >= min_lift, rules),
+        key=lambda rule: rule[column]
+    )
+
+    table = np.empty(shape=len(best_rules), dtype=rule_dtype)
+    table[:] = best_rules
+
+    return table
+
+
 if __name__ == "__main__":
     print(
         generate_rules(
@@ -0,0 +1,170 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import DefaultDict, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from a_priori import count_item_sets, mining_algorithms
+from baskets import BasketStore, from_baskets
+
+
+def _partition_boundaries(file: str, partitions: int) -> List[Tuple[int, int]]:
+    """
+    This function splits a file in byte ranges of about the same size, each one starting at the beginning of a line.
+
+    :param file: the path to the input file
+    :param partitions: the number of ranges
+    :return: the first and last (excluded) byte of each non empty range
+    """
+    size = os.path.getsize(file)
+    starts = [0]
+
+    with open(file, 'rb') as f:
+        for partition in range(1, partitions):
+            f.seek(max(partition * size // partitions, starts[-1]))
+            f.readline()
+            starts.append(min(f.tell(), size))
+
+    return [(start, end) for start, end in zip(starts, starts[1:] + [size]) if end > start]
+
+
+def _read_partition(file: str, start: int, end: int) -> BasketStore:
+    """
+    This function reads the baskets stored between bytes start and end of a .dat file.
+    """
+    with open(file, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode().splitlines()
+
+    return from_baskets(line.split() for line in lines)
+
+
+def _count_baskets(file: str, start: int, end: int) -> int:
+    with open(file, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+
+    return chunk.count(b'\n') + (not chunk.endswith(b'\n'))
+
+
+def _mine_partition(
+        file: str,
+        start: int,
+        end: int,
+        s: int,
+        algorithm: str
+) -> Set[FrozenSet[int]]:
+    """
+    This function finds the itemsets frequent in the partition of the file between bytes start and end.
+    """
+    return set(mining_algorithms[algorithm](baskets=_read_partition(file, start, end), s=s))
+
+
+def _count_partition(
+        file: str,
+        start: int,
+        end: int,
+        candidate_item_sets: Dict[int, List[Tuple[int, ...]]]
+) -> Dict[Tuple[int, ...], int]:
+    """
+    This function counts the support of the candidates, grouped by length, in the partition of the file between bytes
+    start and end.
+    """
+    baskets = _read_partition(file, start, end)
+    item_set_to_support: Dict[Tuple[int, ...], int] = {}
+
+    for item_set_length, item_sets in candidate_item_sets.items():
+        item_set_to_support.update(
+            count_item_sets(baskets=baskets, candidate_item_sets=item_sets, item_set_length=item_set_length)
+        )
+
+    return item_set_to_support
+
+
+def son(
+        file: str,
+        s: int = 1,
+        partitions: Optional[int] = None,
+        processes: Optional[int] = None,
+        algorithm: str = 'a_priori',
+        verbose: bool = False
+) -> Dict[FrozenSet[int], int]:
+    """
+    This function finds the itemsets having support greater than s with the partitioned algorithm presented in
+
+    'A. Savasere, E. Omiecinski, and S. Navathe, An Efficient Algorithm for Mining Association Rules in Large
+    Databases, VLDB'95.'
+
+    The file is split in partitions that are mined in parallel with a support threshold scaled to their size. Since a
+    globally frequent itemset is locally frequent in at least one partition, the union of the local results contains
+    all the frequent itemsets, and a second parallel pass over the partitions counts their exact support. The result
+    is the same as the one of find_frequent_item_sets.
+
+    :param file: the path to the input file
+    :param s: the threshold support to consider an itemset as frequent
+    :param partitions: the number of partitions, by default the number of processes
+    :param processes: the number of processes of the pool, by default the number of cores
+    :param algorithm: the algorithm used to mine each partition, as in mining_algorithms
+    :param verbose: if set to true, prints information on the process
+    :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+    """
+    partitions = partitions if partitions is not None else (processes if processes is not None else os.cpu_count())
+    boundaries = _partition_boundaries(file=file, partitions=partitions)
+
+    if not boundaries:
+        return {}
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        baskets_numbers = list(executor.map(_count_baskets, *zip(*[(file, start, end) for start, end in boundaries])))
+        baskets_number = sum(baskets_numbers)
+
+        # an itemset having support greater than s overall has support greater than s * n_i / n in some partition i
+        local_frequent_item_sets = executor.map(
+            _mine_partition,
+            *zip(*[
+                (file, start, end, s * partition_baskets // baskets_number, algorithm)
+                for (start, end), partition_baskets in zip(boundaries, baskets_numbers)
+            ])
+        )
+
+        candidate_item_sets: DefaultDict[int, Set[Tuple[int, ...]]] = defaultdict(set)
+
+        for item_sets in local_frequent_item_sets:
+            for item_set in item_sets:
+                candidate_item_sets[len(item_set)].add(tuple(sorted(item_set)))
+
+        if verbose:
+            print(
+                f'{sum(map(len, candidate_item_sets.values()))} candidates found in {len(boundaries)} partitions.'
+            )
+
+        candidates_by_length: Dict[int, List[Tuple[int, ...]]] = {
+            item_set_length: list(item_sets) for item_set_length, item_sets in candidate_item_sets.items()
+        }
+        item_set_to_support: DefaultDict[Tuple[int, ...], int] = defaultdict(int)
+
+        for partition_supports in executor.map(
+                _count_partition,
+                *zip(*[(file, start, end, candidates_by_length) for start, end in boundaries])
+        ):
+            for item_set, support in partition_supports.items():
+                item_set_to_support[item_set] += support
+
+    frequent_item_sets = {
+        frozenset(item_set): support
+        for item_set, support in item_set_to_support.items()
+        if support > s
+    }
+
+    if verbose:
+        print(f'In total {len(frequent_item_sets)} frequent items were found.')
+
+    return frequent_item_sets
+
+
+if __name__ == "__main__":
+    print(
+        son(
+            file='../data/T10I4D100K.dat',
+            s=1000
+        )
+    )
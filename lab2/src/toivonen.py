@@ -0,0 +1,247 @@
+import os
+from collections import defaultdict
+from typing import BinaryIO, DefaultDict, Dict, FrozenSet, Optional, Set, Tuple
+
+import numpy as np
+
+from a_priori import count_item_sets, generate_candidate_item_sets, mining_algorithms
+from baskets import BasketStore, from_baskets, iter_baskets, load_baskets
+
+
+def _line_start(f: BinaryIO, offset: int, size: int) -> int:
+    """
+    :return: the first byte of the first line starting at offset or later, as in son._partition_boundaries
+    """
+    if offset <= 0:
+        return 0
+
+    f.seek(min(offset, size))
+    f.readline()
+
+    return min(f.tell(), size)
+
+
+def _sample_baskets(
+        file: str,
+        sample_fraction: float,
+        generator: np.random.Generator,
+        block_size: int
+) -> Tuple[BasketStore, float]:
+    """
+    This function draws a sample of the baskets of a .dat file without reading the whole file. The file is split in
+    blocks of about block_size bytes, each one starting at the beginning of a line, and each block is read
+    independently with probability sample_fraction, at least one block being read.
+
+    :return: the basket store of the sampled baskets and the fraction of the bytes of the file in the sample
+    """
+    size = os.path.getsize(file)
+    blocks_number = max(1, -(-size // block_size))
+    blocks = np.flatnonzero(generator.random(blocks_number) < sample_fraction)
+
+    if len(blocks) == 0:
+        blocks = generator.integers(low=0, high=blocks_number, size=1)
+
+    sampled_lines = []
+    sampled_bytes = 0
+
+    with open(file, 'rb') as f:
+        for block in blocks.tolist():
+            start = _line_start(f, block * block_size, size)
+            end = _line_start(f, (block + 1) * block_size, size)
+            f.seek(start)
+            sampled_lines.extend(line.split() for line in f.read(end - start).decode().splitlines())
+            sampled_bytes += end - start
+
+    return from_baskets(sampled_lines), sampled_bytes / max(size, 1)
+
+
+def negative_border(frequent_item_sets: Dict[FrozenSet[int], int]) -> Set[Tuple[int, ...]]:
+    """
+    This function computes the negative border of a collection of frequent itemsets closed under subsets, that is the
+    itemsets which are not frequent but whose subsets are all frequent. The infrequent singletons are not included,
+    since they are all the items outside the collection.
+
+    :param frequent_item_sets: the frequent itemsets, closed under subsets
+    :return: the itemsets of length at least two of the negative border, as sorted tuples
+    """
+    item_sets_by_length: DefaultDict[int, Set[FrozenSet[int]]] = defaultdict(set)
+
+    for item_set in frequent_item_sets:
+        item_sets_by_length[len(item_set)].add(item_set)
+
+    border: Set[Tuple[int, ...]] = set()
+
+    for item_set_length in range(2, max(item_sets_by_length, default=0) + 2):
+        candidates = generate_candidate_item_sets(
+            precedent_item_sets=item_sets_by_length[item_set_length - 1],
+            item_set_length=item_set_length
+        )
+        border.update(
+            candidate for candidate in candidates if frozenset(candidate) not in item_sets_by_length[item_set_length]
+        )
+
+    return border
+
+
+def toivonen_attempt(
+        file: str,
+        s: int = 1,
+        sample_fraction: float = 0.1,
+        lowering: float = 0.8,
+        algorithm: str = 'a_priori',
+        seed: Optional[int] = None,
+        block_size: int = 2 ** 12,
+        chunk_size: int = 2 ** 22,
+        verbose: bool = False
+) -> Tuple[Dict[FrozenSet[int], int], Set[FrozenSet[int]]]:
+    """
+    This function runs once the algorithm presented in
+
+    'H. Toivonen, Sampling Large Databases for Association Rules, VLDB'96.'
+
+    The sample is made of random blocks of lines of the file, see _sample_baskets, so that drawing it reads about
+    sample_fraction of the file. The itemsets frequent in the sample, with a support threshold scaled to the sample and
+    lowered by lowering, are counted together with their negative border in a single pass over the file. If no
+    itemset of the negative border is frequent, the itemsets found are all the frequent itemsets. Otherwise some
+    frequent itemsets may be missing, and the attempt fails.
+
+    :param file: the path to the input file
+    :param s: the threshold support to consider an itemset as frequent
+    :param sample_fraction: the probability of each basket to be sampled
+    :param lowering: the factor lowering the threshold in the sample, to make failures unlikely
+    :param algorithm: the algorithm used to mine the sample, as in mining_algorithms
+    :param seed: the seed of the sample
+    :param block_size: the approximate number of bytes of the blocks of lines the sample is made of
+    :param chunk_size: the approximate number of bytes read at once
+    :param verbose: if set to true, prints information on the process
+    :return: the frequent itemsets found, mapped to their support, and the frequent itemsets of the negative border,
+             empty if the attempt succeeded
+    """
+    sample, sampled_fraction = _sample_baskets(
+        file=file, sample_fraction=sample_fraction, generator=np.random.default_rng(seed), block_size=block_size
+    )
+    sample_s = int(lowering * s * sampled_fraction)
+    sample_frequent_item_sets = mining_algorithms[algorithm](baskets=sample, s=sample_s)
+    border = negative_border(sample_frequent_item_sets)
+
+    candidate_item_sets: DefaultDict[int, Set[Tuple[int, ...]]] = defaultdict(set)
+
+    for item_set in sample_frequent_item_sets:
+        if len(item_set) > 1:
+            candidate_item_sets[len(item_set)].add(tuple(sorted(item_set)))
+
+    for item_set in border:
+        candidate_item_sets[len(item_set)].add(item_set)
+
+    if verbose:
+        print(
+            f'{len(sample_frequent_item_sets)} itemsets frequent in a sample of {len(sample)} baskets with support '
+            f'{sample_s}, {len(border)} itemsets in their negative border.'
+        )
+
+    # all the singletons are counted, the infrequent ones in the sample being in the negative border
+    item_supports = np.zeros(shape=0, dtype=np.int64)
+    item_set_to_support: DefaultDict[Tuple[int, ...], int] = defaultdict(int)
+
+    for chunk in iter_baskets(file=file, chunk_size=chunk_size):
+        chunk_item_supports = np.bincount(chunk.items)
+        item_supports = np.pad(item_supports, (0, max(0, len(chunk_item_supports) - len(item_supports))))
+        item_supports[:len(chunk_item_supports)] += chunk_item_supports
+
+        for item_set_length, item_sets in candidate_item_sets.items():
+            for item_set, support in count_item_sets(
+                    baskets=chunk,
+                    candidate_item_sets=item_sets,
+                    item_set_length=item_set_length
+            ).items():
+                item_set_to_support[item_set] += support
+
+    items = np.flatnonzero(item_supports > s)
+    frequent_item_sets: Dict[FrozenSet[int], int] = {
+        frozenset([item]): support for item, support in zip(items.tolist(), item_supports[items].tolist())
+    }
+    frequent_item_sets.update(
+        (frozenset(item_set), support) for item_set, support in item_set_to_support.items() if support > s
+    )
+
+    # the counted itemsets not frequent in the sample are in the negative border
+    missed_item_sets = set(frequent_item_sets.keys()).difference(sample_frequent_item_sets)
+
+    if verbose:
+        print(
+            f'{len(frequent_item_sets)} frequent itemsets found, {len(missed_item_sets)} of them in the negative '
+            f'border.'
+        )
+
+    return frequent_item_sets, missed_item_sets
+
+
+def toivonen(
+        file: str,
+        s: int = 1,
+        sample_fraction: float = 0.1,
+        lowering: float = 0.8,
+        max_attempts: int = 3,
+        algorithm: str = 'a_priori',
+        seed: Optional[int] = None,
+        block_size: int = 2 ** 12,
+        chunk_size: int = 2 ** 22,
+        verbose: bool = False
+) -> Dict[FrozenSet[int], int]:
+    """
+    This function finds the itemsets having support greater than s with the sampling algorithm of Toivonen, see
+    toivonen_attempt. After an attempt failing because some itemset of the negative border is frequent, a new sample
+    is drawn and the threshold is lowered further. If all max_attempts attempts fail, the frequent itemsets are mined
+    from the whole file with algorithm. The result is the same as the one of find_frequent_item_sets.
+
+    :param file: the path to the input file
+    :param s: the threshold support to consider an itemset as frequent
+    :param sample_fraction: the probability of each basket to be sampled
+    :param lowering: the factor lowering the threshold in the sample at the first attempt
+    :param max_attempts: the number of attempts before mining the whole file
+    :param algorithm: the algorithm used to mine the samples and, if all attempts fail, the file
+    :param seed: the seed of the samples
+    :param block_size: the approximate number of bytes of the blocks of lines the samples are made of
+    :param chunk_size: the approximate number of bytes read at once
+    :param verbose: if set to true, prints information on the process
+    :return: the set of all frequent itemsets, represented as frozensets, mapped to their support
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+
+    for attempt, attempt_seed in enumerate(seed_sequence.spawn(max_attempts)):
+        frequent_item_sets, missed_item_sets = toivonen_attempt(
+            file=file,
+            s=s,
+            sample_fraction=sample_fraction,
+            lowering=lowering ** (attempt + 1),
+            algorithm=algorithm,
+            seed=attempt_seed,
+            block_size=block_size,
+            chunk_size=chunk_size,
+            verbose=verbose
+        )
+
+        if not missed_item_sets:
+            return frequent_item_sets
+
+        if verbose:
+            print(
+                f'Attempt {attempt + 1} failed: {len(missed_item_sets)} itemsets of the negative border are frequent.'
+            )
+
+    if verbose:
+        print(f'All the {max_attempts} attempts failed, mining the whole file.')
+
+    return mining_algorithms[algorithm](baskets=load_baskets(file=file, chunk_size=chunk_size), s=s)
+
+
+if __name__ == "__main__":
+    print(
+        len(
+            toivonen(
+                file='../data/T10I4D100K.dat',
+                s=500,
+                verbose=True
+            )
+        )
+    )
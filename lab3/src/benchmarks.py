@@ -0,0 +1,111 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+
+from triangles import count_triangles
+from triest import Triest, TriestBase, TriestImproved
+
+
+def benchmark_edge_cost(
+        file: str,
+        M: Iterable[int],
+        algorithms: Iterable[Type[Triest]] = (TriestBase, TriestImproved)
+) -> Dict[str, List[float]]:
+    """
+    This function measures the average time spent on each edge of the stream by the triest algorithms for several
+    sizes of the memory.
+
+    :param file: the path to the file containing the stream of edges
+    :param M: the sizes of the memory
+    :param algorithms: the triest classes to be measured
+    :return: a dictionary linking the name of each algorithm to its time per edge in microseconds, one per size
+    """
+    M = list(M)
+    algorithms = list(algorithms)
+    costs: Dict[str, List[float]] = {algorithm.__name__: [] for algorithm in algorithms}
+
+    print(f'{"M":>8}' + ''.join(f'{algorithm.__name__:>16}' for algorithm in algorithms))
+
+    for m in M:
+        for algorithm in algorithms:
+            triest = algorithm(file=file, M=m, verbose=False)
+            start = time.perf_counter()
+            triest.run()
+            costs[algorithm.__name__].append((time.perf_counter() - start) / triest.t * 1e6)
+
+        print(f'{m:>8}' + ''.join(f'{costs[algorithm.__name__][-1]:>13.2f}µs' for algorithm in algorithms))
+
+    return costs
+
+
+def benchmark_estimation_error(
+        file: str,
+        M: Iterable[int],
+        algorithms: Iterable[Type[Triest]] = (TriestBase, TriestImproved),
+        runs: int = 5,
+        seed: Optional[int] = None
+) -> Dict[str, List[Tuple[float, float, float]]]:
+    """
+    This function compares the estimates of the triest algorithms for several sizes of the memory with the exact
+    number of triangles of the graph, computed with count_triangles.
+
+    :param file: the path to the file containing the stream of edges
+    :param M: the sizes of the memory
+    :param algorithms: the triest classes to be evaluated
+    :param runs: the number of runs of each algorithm for each size, with different seeds
+    :param seed: the seed from which the seeds of the runs are derived
+    :return: a dictionary linking the name of each algorithm to the mean and the standard deviation of the relative
+             error of the global estimate and to the mean relative error of the local estimates, one per size
+    """
+    tau, tau_vertices = count_triangles(file=file)
+    M = list(M)
+    algorithms = list(algorithms)
+    seeds = np.random.SeedSequence(seed).generate_state(runs).tolist()
+    errors: Dict[str, List[Tuple[float, float, float]]] = {algorithm.__name__: [] for algorithm in algorithms}
+
+    print(f'The graph contains {tau} triangles.')
+    print(
+        f'{"M":>8}' + ''.join(
+            f'{algorithm.__name__ + " error":>24}{algorithm.__name__ + " local":>24}' for algorithm in algorithms
+        )
+    )
+
+    for m in M:
+        for algorithm in algorithms:
+            global_errors, local_errors = [], []
+
+            for run_seed in seeds:
+                triest = algorithm(file=file, M=m, verbose=False, seed=run_seed)
+                global_errors.append(abs(triest.run() - tau) / tau)
+                local_estimates = triest.local_estimates()
+                local_errors.append(np.mean([
+                    abs(local_estimates.get(vertex, 0) - triangles) / triangles
+                    for vertex, triangles in tau_vertices.items()
+                ]))
+
+            errors[algorithm.__name__].append(
+                (float(np.mean(global_errors)), float(np.std(global_errors)), float(np.mean(local_errors)))
+            )
+
+        print(
+            f'{m:>8}' + ''.join(
+                f'{errors[algorithm.__name__][-1][0]:>15.2%} ± {errors[algorithm.__name__][-1][1]:>6.2%}'
+                f'{errors[algorithm.__name__][-1][2]:>24.2%}'
+                for algorithm in algorithms
+            )
+        )
+
+    return errors
+
+
+if __name__ == "__main__":
+    benchmark_estimation_error(
+        file='../data/facebook_combined.txt',
+        M=[1000, 5000, 10000, 20000, 40000]
+    )
+
+    benchmark_edge_cost(
+        file='../data/facebook_combined.txt',
+        M=[1000, 5000, 10000, 20000, 40000, 80000]
+    )
@@ -0,0 +1,141 @@
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Type
+
+import numpy as np
+
+from triest import Triest, TriestImproved
+
+
+class EnsembleEstimate(NamedTuple):
+    """
+    The combined estimate of an ensemble, with the bounds of its confidence interval and the estimates of each instance.
+    """
+    estimate: float
+    lower: float
+    upper: float
+    estimates: np.ndarray
+
+
+def _run_instance(algorithm: Type[Triest], file: str, M: int, seed: int) -> float:
+    return algorithm(file=file, M=M, verbose=False, seed=seed).run()
+
+
+def _mean(estimates: np.ndarray, groups: int) -> float:
+    return float(np.mean(estimates))
+
+
+def _median_of_means(estimates: np.ndarray, groups: int) -> float:
+    """
+    :param estimates: the estimates of the instances
+    :param groups: the number of groups the estimates are split into
+    :return: the median of the means of the groups
+    """
+    return float(np.median([np.mean(group) for group in np.array_split(estimates, min(groups, len(estimates)))]))
+
+
+aggregation_methods: Dict[str, Callable[[np.ndarray, int], float]] = {
+    'mean': _mean,
+    'median_of_means': _median_of_means
+}
+
+
+def _confidence_interval(
+        estimates: np.ndarray,
+        aggregation: str,
+        groups: int,
+        confidence: float,
+        generator: np.random.Generator,
+        bootstrap_samples: int
+) -> Tuple[float, float]:
+    """
+    This function computes the confidence interval of the combined estimate. For the mean the normal approximation is
+    used, while for the median of means the interval is given by the quantiles of the combined estimates of bootstrap
+    resamples of the estimates.
+    """
+    if len(estimates) < 2:
+        return -np.inf, np.inf
+
+    if aggregation == 'mean':
+        half_width = NormalDist().inv_cdf((1 + confidence) / 2) * np.std(estimates, ddof=1) / np.sqrt(len(estimates))
+        mean = float(np.mean(estimates))
+
+        return mean - half_width, mean + half_width
+
+    resamples = generator.choice(estimates, size=(bootstrap_samples, len(estimates)), replace=True)
+    combined = [aggregation_methods[aggregation](resample, groups) for resample in resamples]
+    lower, upper = np.quantile(combined, [(1 - confidence) / 2, (1 + confidence) / 2])
+
+    return float(lower), float(upper)
+
+
+def ensemble(
+        file: str,
+        M: int,
+        instances: int = 8,
+        algorithm: Type[Triest] = TriestImproved,
+        aggregation: str = 'median_of_means',
+        groups: Optional[int] = None,
+        confidence: float = 0.95,
+        processes: Optional[int] = None,
+        seed: Optional[int] = None,
+        bootstrap_samples: int = 1000
+) -> EnsembleEstimate:
+    """
+    This function runs independent instances of a triest algorithm with different seeds on a pool of processes and
+    combines their estimates of the number of triangles. The memory budget M is shared, so that each instance keeps
+    M // instances edges and the ensemble uses the same memory as a single instance.
+
+    :param file: the path to the file containing the stream
+    :param M: the total size of the memory, split among the instances
+    :param instances: the number of independent instances
+    :param algorithm: the triest class to be run
+    :param aggregation: either mean or median_of_means, the method used to combine the estimates
+    :param groups: the number of groups of the median of means, by default the square root of the instances
+    :param confidence: the confidence level of the interval
+    :param processes: the number of processes of the pool, by default the number of cores
+    :param seed: the seed from which the seeds of the instances are derived
+    :param bootstrap_samples: the number of resamples used for the interval of the median of means
+    :return: the combined estimate, the bounds of its confidence interval and the estimates of the instances
+    """
+    if M // instances < 3:
+        raise ValueError(f'A memory of {M} edges is too small for {instances} instances.')
+
+    groups = groups if groups is not None else max(1, int(np.sqrt(instances)))
+    seed_sequence = np.random.SeedSequence(seed)
+    seeds = [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(instances)]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        estimates = np.array(list(executor.map(
+            _run_instance,
+            [algorithm] * instances,
+            [file] * instances,
+            [M // instances] * instances,
+            seeds
+        )))
+
+    lower, upper = _confidence_interval(
+        estimates=estimates,
+        aggregation=aggregation,
+        groups=groups,
+        confidence=confidence,
+        generator=np.random.default_rng(seed_sequence),
+        bootstrap_samples=bootstrap_samples
+    )
+
+    return EnsembleEstimate(
+        estimate=aggregation_methods[aggregation](estimates, groups),
+        lower=lower,
+        upper=upper,
+        estimates=estimates
+    )
+
+
+if __name__ == "__main__":
+    print(
+        ensemble(
+            file='../data/facebook_combined.txt',
+            M=16000,
+            instances=8
+        )
+    )
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterable, Iterator, List, Set, Tuple
+
+Edge = Tuple[int, int]
+
+
+def _normalize(edge: Iterable[int]) -> Edge:
+    u, v = edge
+
+    return (u, v) if u <= v else (v, u)
+
+
+class EdgeReservoir:
+    """
+    Sample of edges kept by the triest algorithms. The edges are stored in an array, so that a random edge can be drawn
+    and removed in constant time by swapping it with the last one, together with the adjacency sets of the vertices,
+    so that the neighbourhood of a vertex is available in constant time.
+    """
+
+    def __init__(self) -> None:
+        self.edges: List[Edge] = []
+        self.adjacency: DefaultDict[int, Set[int]] = defaultdict(set)
+        self._positions: Dict[Edge, int] = {}
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def __contains__(self, edge: Iterable[int]) -> bool:
+        return _normalize(edge) in self._positions
+
+    def __iter__(self) -> Iterator[Edge]:
+        return iter(self.edges)
+
+    def add(self, edge: Iterable[int]) -> None:
+        """
+        This function adds an edge to the sample, if not already present.
+
+        :param edge: the edge to be added
+        :return: nothing
+        """
+        edge = _normalize(edge)
+
+        if edge not in self._positions:
+            u, v = edge
+            self._positions[edge] = len(self.edges)
+            self.edges.append(edge)
+            self.adjacency[u].add(v)
+            self.adjacency[v].add(u)
+
+    def remove(self, edge: Iterable[int]) -> None:
+        """
+        This function removes an edge from the sample, moving the last edge of the array in its place.
+
+        :param edge: the edge to be removed
+        :return: nothing
+        """
+        edge = _normalize(edge)
+        position = self._positions.pop(edge)
+        last_edge = self.edges.pop()
+
+        if last_edge != edge:
+            self.edges[position] = last_edge
+            self._positions[last_edge] = position
+
+        u, v = edge
+
+        for vertex, neighbour in ((u, v), (v, u)):
+            neighbours = self.adjacency[vertex]
+            neighbours.discard(neighbour)
+
+            if not neighbours:
+                del self.adjacency[vertex]
+
+    def random_edge(self, random_number: float) -> Edge:
+        """
+        :param random_number: a number drawn uniformly in [0, 1)
+        :return: the edge of the sample selected by random_number, so that each edge is equally likely
+        """
+        return self.edges[int(random_number * len(self.edges))]
+
+    def neighbours(self, vertex: int) -> Set[int]:
+        """
+        :param vertex: a vertex of the graph
+        :return: the set of the neighbours of vertex in the sample
+        """
+        return self.adjacency.get(vertex, set())
+
+    def common_neighbourhood(self, edge: Iterable[int]) -> Set[int]:
+        """
+        This function computes the vertices adjacent in the sample to both endpoints of the edge, iterating over the
+        smallest of the two neighbourhoods.
+
+        :param edge: the edge whose endpoints are considered
+        :return: the set of the common neighbours
+        """
+        u, v = edge
+
+        # set intersection iterates over the smallest of the two sets
+        return self.neighbours(u) & self.neighbours(v)
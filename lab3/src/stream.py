@@ -0,0 +1,131 @@
+import asyncio
+import os
+import tempfile
+from typing import AsyncIterable, AsyncIterator, Iterable, Tuple, Union
+
+from reservoir import Edge
+from triest import Triest, TriestFD, TriestImproved
+
+# an element of a stream: a line as in the files of the edges or of the operations, or an edge
+StreamElement = Union[str, bytes, Edge]
+
+
+def _parse(element: StreamElement) -> Tuple[bool, Edge]:
+    """
+    :param element: a line such as 'u v', '+u v' or '-u v', or a pair of vertices
+    :return: true if the edge is inserted and false if it is deleted, and the edge
+    """
+    if isinstance(element, bytes):
+        element = element.decode()
+
+    if not isinstance(element, str):
+        u, v = element
+        return True, (u, v)
+
+    element = element.strip()
+    insertion = not element.startswith('-')
+    u, v = element.lstrip('+-').split()
+
+    return insertion, (int(u), int(v))
+
+
+async def consume(
+        triest: Triest,
+        source: Union[Iterable[StreamElement], AsyncIterable[StreamElement]],
+        batch_size: int = 1024
+) -> float:
+    """
+    This function feeds a triest algorithm with the elements of a stream as they arrive. The source can be any iterable
+    or asynchronous iterable, such as an asyncio.StreamReader reading from a socket or the file object returned by
+    socket.makefile. The elements are processed in batches of batch_size, and control is given back to the event loop
+    after each batch, so that the estimates can be queried while the stream is consumed.
+
+    :param triest: the algorithm to be fed, deletions are allowed only for TriestFD
+    :param source: the stream, as lines 'u v', '+u v' or '-u v', either str or bytes, or as pairs of vertices
+    :param batch_size: the number of elements processed between two returns to the event loop
+    :return: the estimated number of triangles at the end of the stream
+    """
+    edges, insertions = [], []
+
+    async def flush() -> None:
+        if isinstance(triest, TriestFD):
+            triest.process_batch(edges, insertions)
+        elif not all(insertions):
+            raise ValueError(f'{type(triest).__name__} does not support deletions.')
+        else:
+            triest.process_batch(edges)
+
+        edges.clear()
+        insertions.clear()
+        await asyncio.sleep(0)
+
+    async def elements() -> AsyncIterator[StreamElement]:
+        if hasattr(source, '__aiter__'):
+            async for element in source:
+                yield element
+        else:
+            for element in source:
+                yield element
+
+    async for element in elements():
+        if isinstance(element, (str, bytes)) and not element.strip():
+            continue
+
+        insertion, edge = _parse(element)
+        edges.append(edge)
+        insertions.append(insertion)
+
+        if len(edges) == batch_size:
+            await flush()
+
+    await flush()
+
+    return triest.estimate()
+
+
+async def serve_file(file: str, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+    """
+    This function starts a server which replays the lines of a file to each client and then closes the connection. It
+    stands in for a producer of edges when testing consume.
+
+    :param file: the path to the file to be replayed
+    :param host: the address the server listens on
+    :param port: the port the server listens on, by default any free port
+    :return: the server
+    """
+    async def replay(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        with open(file, 'rb') as f:
+            for line in f:
+                writer.write(line)
+                await writer.drain()
+
+        writer.close()
+        await writer.wait_closed()
+
+    return await asyncio.start_server(replay, host=host, port=port)
+
+
+async def _main() -> None:
+    server = await serve_file('../data/facebook_combined.txt')
+    host, port = server.sockets[0].getsockname()[:2]
+    triest = TriestImproved(file='../data/facebook_combined.txt', M=10000, verbose=False)
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(0.5)
+            print(f'{triest.t} edges processed, estimated {triest.estimate():.0f} triangles.')
+
+    async with server:
+        reader, writer = await asyncio.open_connection(host, port)
+        reporter = asyncio.create_task(report())
+        print(f'Estimated {await consume(triest, reader):.0f} triangles.')
+        reporter.cancel()
+        writer.close()
+
+    path = os.path.join(tempfile.gettempdir(), 'triest.npz')
+    triest.snapshot(path)
+    print(f'Restored estimate: {TriestImproved.restore(path).estimate():.0f} triangles.')
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,35 +1,114 @@
-from typing import Tuple, Callable, Set, DefaultDict, FrozenSet
+from abc import ABC, abstractmethod
+from typing import Tuple, Callable, Set, DefaultDict, Dict, Iterable, Iterator, List, Optional
 from collections import defaultdict
-from scipy.stats import bernoulli
-from functools import reduce
-import random
+import json
+from math import exp, inf, lgamma
+import numpy as np
 
+from reservoir import Edge, EdgeReservoir
 
-def _get_edge(line: str) -> FrozenSet[int]:
-    return frozenset([int(vertex) for vertex in line.split()])
+import _common  # noqa: F401, makes the common modules importable
+from graph_io import iter_edges
 
 
-class Triest:
+def _read_edges(file: str, chunk_size: int = 2 ** 20) -> Iterator[np.ndarray]:
+    """
+    This function reads a file containing an edge per line in chunks of about chunk_size bytes.
+
+    :param file: the path to the file to be read
+    :param chunk_size: the approximate number of bytes read for each chunk
+    :return: an iterator over the chunks, each one an array of shape (edges_number, 2)
+    """
+    for edges, _ in iter_edges(file=file, chunk_size=chunk_size):
+        yield edges
+
+
+def _read_operations(file: str, chunk_size: int = 2 ** 20) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    This function reads a file containing an operation per line in chunks of about chunk_size bytes. An operation is
+    an edge preceded by + if the edge is inserted, as in '+u v' or '+ u v', or by - if the edge is deleted. Lines
+    without sign are insertions.
+
+    :param file: the path to the file to be read
+    :param chunk_size: the approximate number of bytes read for each chunk
+    :return: an iterator over the chunks, each one an array of shape (operations_number,) which is true for the
+             insertions and an array of shape (operations_number, 2) of edges
+    """
+    with open(file, 'r') as f:
+        while True:
+            lines = f.readlines(chunk_size)
+
+            if not lines:
+                break
+
+            lines = [line.strip() for line in lines if not line.isspace()]
+
+            insertions = np.fromiter((line[0] != '-' for line in lines), dtype=bool, count=len(lines))
+            edges = np.array(
+                ' '.join(line[1:] if line[0] in '+-' else line for line in lines).split(),
+                dtype=np.int64
+            ).reshape(-1, 2)
+
+            yield insertions, edges
+
+
+class Triest(ABC):
     """
     Blueprint for triest triangle estimation method.
     """
 
-    def __init__(self, file: str, M: int, verbose: bool = True):
+    # the scalar counters saved by snapshot
+    _counters: Tuple[str, ...] = ('t', 'tau')
+
+    def __init__(
+            self,
+            file: Optional[str] = None,
+            *,
+            M: int,
+            verbose: bool = True,
+            seed: Optional[int] = None,
+            chunk_size: int = 2 ** 20,
+            random_block_size: int = 2 ** 14
+    ):
         """
         This function initializes the class with all counters set to zero. Moreover, it initializes the file path
-        to file and the memory size to M.
+        to file and the memory size to M, which has no default and must be passed by keyword.
 
-        :param file: the path to the file to be read
+        :param file: the path to the file to be read by run, None if the edges are only pushed with process_edge and
+                     process_batch
         :param M: the size of the memory for the algorithm
         :param verbose: if true, prints information on screen
+        :param seed: the seed of the random numbers, two runs with the same seed give the same estimates
+        :param chunk_size: the approximate number of bytes of the file read at once
+        :param random_block_size: the number of random numbers drawn at once
         """
-        self.file: str = file
+        self.file: Optional[str] = file
         self.M: int = M
         self.verbose = verbose
-        self.S: Set[FrozenSet[int]] = set()
+        self.S: EdgeReservoir = EdgeReservoir()
         self.t: int = 0
         self.tau_vertices: DefaultDict[int, int] = defaultdict(int)
         self.tau: int = 0
+        self.chunk_size: int = chunk_size
+        self.random_block_size: int = random_block_size
+        self.generator: np.random.Generator = np.random.default_rng(seed=seed)
+        self._random_numbers: List[float] = []
+        self._next_random_number: int = 0
+
+    def _random(self) -> float:
+        """
+        This function returns a number drawn uniformly in [0, 1). The numbers are drawn from the generator in blocks
+        of random_block_size, which gives the same sequence as drawing them one at a time.
+
+        :return: the random number
+        """
+        if self._next_random_number == len(self._random_numbers):
+            self._random_numbers = self.generator.random(size=self.random_block_size).tolist()
+            self._next_random_number = 0
+
+        self._next_random_number += 1
+
+        return self._random_numbers[self._next_random_number - 1]
 
     @property
     def xi(self) -> float:
@@ -50,15 +129,15 @@ class Triest:
         """
         if t <= self.M:
             return True
-        elif bernoulli.rvs(p=self.M / t):
-            edge_to_remove: FrozenSet[int] = random.choice(list(self.S))
+        elif self._random() < self.M / t:
+            edge_to_remove: Edge = self.S.random_edge(self._random())
             self.S.remove(edge_to_remove)
             self._update_counters(lambda x, y: x - y, edge_to_remove)
             return True
         else:
             return False
 
-    def _update_counters(self, operator: Callable[[int, int], int], edge: FrozenSet[int]) -> None:
+    def _update_counters(self, operator: Callable[[int, int], int], edge: Edge) -> None:
         """
         This function updates the counters related to estimating the number of triangles. The update happens through
         the operator lambda and involves the edge and its neighbours.
@@ -67,17 +146,7 @@ class Triest:
         :param edge: the edge interested in the update
         :return: nothing
         """
-        common_neighbourhood: Set[int] = reduce(
-            lambda a, b: a & b,
-            [
-                {
-                    node
-                    for link in self.S if vertex in link
-                    for node in link if node != vertex
-                }
-                for vertex in edge
-            ]
-        )
+        common_neighbourhood: Set[int] = self.S.common_neighbourhood(edge)
 
         for vertex in common_neighbourhood:
             self.tau = operator(self.tau, 1)
@@ -86,17 +155,64 @@ class Triest:
             for node in edge:
                 self.tau_vertices[node] = operator(self.tau_vertices[node], 1)
 
+    @property
+    @abstractmethod
+    def scale(self) -> float:
+        """
+        :return: the factor turning the counters into estimates of the number of triangles
+        """
 
-class TriestBase(Triest):
-    """
-        This class implements the algorithm Triest base presented in the paper
+    @abstractmethod
+    def process_edge(self, edge: Edge) -> None:
+        """
+        This function processes the next edge of the stream.
 
-        'L. De Stefani, A. Epasto, M. Riondato, and E. Upfal, TRIÈST: Counting Local and Global Triangles in Fully-Dynamic
-        Streams with Fixed Memory Size, KDD'16.'
+        :param edge: the edge, as a pair of vertices
+        :return: nothing
+        """
 
-        The algorithm provides an estimate of the number of triangles in a graph in a streaming environment,
-        where the stream represent a series of edges.
-    """
+    def process_batch(self, edges: Iterable[Edge]) -> None:
+        """
+        This function processes the next edges of the stream, in order.
+
+        :param edges: the edges, as pairs of vertices or as an array of shape (edges_number, 2)
+        :return: nothing
+        """
+        if isinstance(edges, np.ndarray):
+            edges = edges.tolist()
+
+        for edge in edges:
+            self.process_edge(edge)
+
+    def estimate(self) -> float:
+        """
+        :return: the current estimate of the number of triangles in the graph
+        """
+        return self.scale * self.tau
+
+    def local_estimate(self, vertex: int) -> float:
+        """
+        :param vertex: a vertex of the graph
+        :return: the current estimate of the number of triangles the vertex belongs to
+        """
+        return self.scale * self.tau_vertices.get(vertex, 0)
+
+    def local_estimates(self) -> Dict[int, float]:
+        """
+        :return: the current estimate of the number of triangles each vertex belongs to
+        """
+        scale = self.scale
+
+        return {vertex: scale * tau for vertex, tau in self.tau_vertices.items()}
+
+    def _read_stream(self) -> Iterator[Tuple[np.ndarray, ...]]:
+        """
+        This function reads the stream from the file in chunks, each one given as the arguments of process_batch.
+
+        :return: an iterator over the chunks of edges of the file
+        """
+        for chunk in _read_edges(self.file, self.chunk_size):
+            yield chunk,
 
     def run(self) -> float:
         """
@@ -104,31 +220,103 @@ class TriestBase(Triest):
 
         :return: the estimated number of triangles
         """
+        if self.file is None:
+            raise ValueError(
+                'run() needs a file, the edges of this instance can only be pushed with process_edge or process_batch.'
+            )
 
         if self.verbose:
             print("Running the algorithm with M = {}.".format(self.M))
 
-        with open(self.file, 'r') as f:
+        for batch in self._read_stream():
+            self.process_batch(*batch)
+
             if self.verbose:
-                print("File opened, processing the stream...")
+                print("The current estimate for the number of triangles at element {} is {}.".format(
+                    self.t, self.estimate())
+                )
+
+        return self.estimate()
+
+    def snapshot(self, path: str) -> None:
+        """
+        This function saves the sample, the counters and the state of the random numbers to a .npz file, so that the
+        algorithm can be restored and fed with the rest of the stream giving the same estimates.
+
+        :param path: the path of the file
+        :return: nothing
+        """
+        np.savez(
+            path,
+            algorithm=np.array(type(self).__name__),
+            # an empty string stands for no file, to keep the archive free of object arrays
+            stream_file=np.array(self.file or ''),
+            M=np.array(self.M),
+            edges=np.array(self.S.edges, dtype=np.int64).reshape(-1, 2),
+            vertices=np.array(list(self.tau_vertices.keys()), dtype=np.int64),
+            vertex_counters=np.array(list(self.tau_vertices.values())),
+            generator=np.array(json.dumps(self.generator.bit_generator.state)),
+            random_numbers=np.array(self._random_numbers[self._next_random_number:], dtype=np.float64),
+            **{counter: np.array(getattr(self, counter)) for counter in self._counters}
+        )
+
+    @classmethod
+    def restore(cls, path: str, verbose: bool = False, **kwargs) -> 'Triest':
+        """
+        This function creates an instance of the algorithm from a snapshot.
+
+        :param path: the path of the .npz file written by snapshot
+        :param verbose: if true, prints information on screen
+        :param kwargs: the other arguments of the constructor
+        :return: the restored instance
+        """
+        with np.load(path) as snapshot:
+            if str(snapshot['algorithm']) != cls.__name__:
+                raise ValueError(f'The snapshot was taken from {snapshot["algorithm"]}, not from {cls.__name__}.')
+
+            triest = cls(file=str(snapshot['stream_file']) or None, M=int(snapshot['M']), verbose=verbose, **kwargs)
+
+            for edge in snapshot['edges'].tolist():
+                triest.S.add(edge)
+
+            triest.tau_vertices.update(zip(snapshot['vertices'].tolist(), snapshot['vertex_counters'].tolist()))
+            triest.generator.bit_generator.state = json.loads(str(snapshot['generator']))
+            triest._random_numbers = snapshot['random_numbers'].tolist()
+
+            for counter in cls._counters:
+                setattr(triest, counter, snapshot[counter].item())
+
+        return triest
+
 
-            for line in f:
-                edge = _get_edge(line)
-                self.t += 1
+class TriestBase(Triest):
+    """
+        This class implements the algorithm Triest base presented in the paper
+
+        'L. De Stefani, A. Epasto, M. Riondato, and E. Upfal, TRIÈST: Counting Local and Global Triangles in Fully-Dynamic
+        Streams with Fixed Memory Size, KDD'16.'
+
+        The algorithm provides an estimate of the number of triangles in a graph in a streaming environment,
+        where the stream represent a series of edges.
+    """
 
-                if self.verbose and self.t % 1000 == 0:
-                    print("Currently sampling element {} in the stream.".format(self.t))
+    @property
+    def scale(self) -> float:
+        return self.xi
 
-                if self._sample_edge(self.t):
-                    self.S.add(edge)
-                    self._update_counters(lambda x, y: x + y, edge)
+    def process_edge(self, edge: Edge) -> None:
+        """
+        This function processes the next edge of the stream, which is added to the sample and to the counters if
+        sampled.
 
-                if self.verbose and self.t % 1000 == 0:
-                    print("The current estimate for the number of triangles is {}.".format(
-                        self.xi * self.tau)
-                    )
+        :param edge: the edge, as a pair of vertices
+        :return: nothing
+        """
+        self.t += 1
 
-            return self.xi * self.tau
+        if self._sample_edge(self.t):
+            self.S.add(edge)
+            self._update_counters(lambda x, y: x + y, edge)
 
 
 class TriestImproved(Triest):
@@ -149,7 +337,7 @@ class TriestImproved(Triest):
             ((self.t - 1) * (self.t - 2)) / (self.M * (self.M - 1))
         )
 
-    def _update_counters(self, operator: Callable[[int, int], int], edge: FrozenSet[int]) -> None:
+    def _update_counters(self, operator: Callable[[int, int], int], edge: Edge) -> None:
         """
         This function updates the counters related to estimating the number of triangles. The update happens through
         the operator lambda and involves the edge and its neighbours.
@@ -158,24 +346,15 @@ class TriestImproved(Triest):
         :param edge: the edge interested in the update
         :return: nothing
         """
-        common_neighbourhood: Set[int] = reduce(
-            lambda a, b: a & b,
-            [
-                {
-                    node
-                    for link in self.S if vertex in link
-                    for node in link if node != vertex
-                }
-                for vertex in edge
-            ]
-        )
+        common_neighbourhood: Set[int] = self.S.common_neighbourhood(edge)
+        eta = self.eta
 
         for vertex in common_neighbourhood:
-            self.tau += self.eta
-            self.tau_vertices[vertex] += self.eta
+            self.tau += eta
+            self.tau_vertices[vertex] += eta
 
             for node in edge:
-                self.tau_vertices[node] += self.eta
+                self.tau_vertices[node] += eta
 
     def _sample_edge(self, t: int) -> bool:
         """
@@ -189,45 +368,166 @@ class TriestImproved(Triest):
 
         if t <= self.M:
             return True
-        elif bernoulli.rvs(p=self.M / t):
-            edge_to_remove: FrozenSet[int] = random.choice(list(self.S))
+        elif self._random() < self.M / t:
+            edge_to_remove: Edge = self.S.random_edge(self._random())
             self.S.remove(edge_to_remove)
             return True
         else:
             return False
 
-    def run(self) -> float:
+    @property
+    def scale(self) -> float:
+        return 1.0
+
+    def process_edge(self, edge: Edge) -> None:
         """
-        Runs the algorithm from the stream on the file.
+        This function processes the next edge of the stream, which is added to the counters and then to the sample
+        if sampled.
 
-        :return: the estimated number of triangles
+        :param edge: the edge, as a pair of vertices
+        :return: nothing
         """
+        self.t += 1
+        self._update_counters(lambda x, y: x + y, edge)
 
-        if self.verbose:
-            print("Running the algorithm with M = {}.".format(self.M))
+        if self._sample_edge(self.t):
+            self.S.add(edge)
 
-        with open(self.file, 'r') as f:
-            if self.verbose:
-                print("File opened, processing the stream...")
 
-            for line in f:
-                edge = _get_edge(line)
-                self.t += 1
+class TriestFD(Triest):
+    """
+        This class implements the algorithm Triest fully-dynamic presented in the paper
+
+        'L. De Stefani, A. Epasto, M. Riondato, and E. Upfal, TRIÈST: Counting Local and Global Triangles in Fully-Dynamic
+        Streams with Fixed Memory Size, KDD'16.'
+
+        The algorithm provides an estimate of the number of triangles in a graph in a streaming environment,
+        where the stream represent a series of insertions and deletions of edges. Deletions are compensated by the
+        following insertions through random pairing.
+    """
+
+    _counters: Tuple[str, ...] = Triest._counters + ('s', 'd_i', 'd_o')
+
+    def __init__(self, *args, **kwargs):
+        """
+        This function initializes the class as Triest, with the counters of the edges in the graph and of the
+        uncompensated deletions set to zero. The file must contain an operation per line, see _read_operations.
+        """
+        super().__init__(*args, **kwargs)
+        # number of edges currently in the graph
+        self.s: int = 0
+        # uncompensated deletions of edges which were in the sample and which were not
+        self.d_i: int = 0
+        self.d_o: int = 0
+
+    @property
+    def kappa(self) -> float:
+        """
+        :return: the probability that the sample contains at least three edges
+        """
+        d = self.d_i + self.d_o
+        omega = min(self.M, self.s + d)
+
+        def log_binomial(n: int, k: int) -> float:
+            return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1) if 0 <= k <= n else -inf
+
+        return 1.0 - sum(
+            exp(log_binomial(self.s, j) + log_binomial(d, omega - j) - log_binomial(self.s + d, omega))
+            for j in range(3)
+        )
+
+    @property
+    def scale(self) -> float:
+        """
+        :return: the factor turning the counters into unbiased estimates of the number of triangles
+        """
+        sample_size = len(self.S)
+
+        if sample_size < 3:
+            return 0.0
+
+        return (self.s * (self.s - 1) * (self.s - 2)) / (sample_size * (sample_size - 1) * (sample_size - 2)) \
+            / self.kappa
+
+    def _sample_edge(self, t: int) -> bool:
+        """
+        This function determines if the new edge can be inserted in memory. If there are no deletions to be
+        compensated, the edge is sampled as in Triest base, otherwise it takes the place of a deleted edge with the
+        probability that the deleted edge was in the sample.
+
+        :param t: the number of edges currently in the graph
+        :return: true if the new edge can be inserted in the memory, false otherwise
+        """
+        if self.d_i + self.d_o == 0:
+            if len(self.S) < self.M:
+                return True
+            elif self._random() < self.M / t:
+                edge_to_remove: Edge = self.S.random_edge(self._random())
+                self.S.remove(edge_to_remove)
+                self._update_counters(lambda x, y: x - y, edge_to_remove)
+                return True
+            else:
+                return False
+        elif self._random() < self.d_i / (self.d_i + self.d_o):
+            self.d_i -= 1
+            return True
+        else:
+            self.d_o -= 1
+            return False
 
-                if self.verbose and self.t % 1000 == 0:
-                    print("Currently sampling element {} in the stream.".format(self.t))
+    def process_edge(self, edge: Edge, insertion: bool = True) -> None:
+        """
+        This function processes the next operation of the stream.
 
+        :param edge: the edge, as a pair of vertices
+        :param insertion: true if the edge is inserted in the graph, false if it is deleted
+        :return: nothing
+        """
+        self.t += 1
+
+        if insertion:
+            self.s += 1
+
+            if self._sample_edge(self.s):
+                self.S.add(edge)
                 self._update_counters(lambda x, y: x + y, edge)
+        else:
+            self.s -= 1
 
-                if self._sample_edge(self.t):
-                    self.S.add(edge)
+            if edge in self.S:
+                self._update_counters(lambda x, y: x - y, edge)
+                self.S.remove(edge)
+                self.d_i += 1
+            else:
+                self.d_o += 1
 
-                if self.verbose and self.t % 1000 == 0:
-                    print(
-                        "The current estimate for the number of triangles is {}.".format(self.tau)
-                    )
+    def process_batch(self, edges: Iterable[Edge], insertions: Optional[Iterable[bool]] = None) -> None:
+        """
+        This function processes the next operations of the stream, in order.
+
+        :param edges: the edges, as pairs of vertices or as an array of shape (operations_number, 2)
+        :param insertions: for each edge, true if it is inserted and false if it is deleted, by default all insertions
+        :return: nothing
+        """
+        if insertions is None:
+            super().process_batch(edges)
+            return
+
+        if isinstance(edges, np.ndarray):
+            edges = edges.tolist()
 
-            return self.tau
+        if isinstance(insertions, np.ndarray):
+            insertions = insertions.tolist()
+
+        for edge, insertion in zip(edges, insertions):
+            self.process_edge(edge, insertion)
+
+    def _read_stream(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        :return: an iterator over the chunks of operations of the file, each one as the edges and the insertions
+        """
+        for insertions, edges in _read_operations(self.file, self.chunk_size):
+            yield edges, insertions
 
 
 if __name__ == "__main__":
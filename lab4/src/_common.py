@@ -0,0 +1,10 @@
+import os
+import sys
+
+# the labs are run from their src directory, the modules shared by the labs are made importable from here only once
+COMMON_DIRECTORY = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'common')
+)
+
+if COMMON_DIRECTORY not in sys.path:
+    sys.path.append(COMMON_DIRECTORY)
@@ -1,8 +1,12 @@
+import time
+
 import networkx as nx
 import numpy as np
-from scipy import linalg
-from sklearn.cluster import KMeans
-from typing import Callable, Dict, Tuple
+from scipy import linalg, sparse
+from scipy.sparse.linalg import eigsh, lobpcg
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from threadpoolctl import threadpool_limits
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 selection_methods: Dict[str, Callable[[np.ndarray, int], int]] = {
     # +2 because 1 accounts for indices starting from 0 and 1 accounts for the fact that k is the index of the NEXT
@@ -11,12 +15,204 @@ selection_methods: Dict[str, Callable[[np.ndarray, int], int]] = {
     'manual': lambda eigenvalues, k: k
 }
 
+# each clustering method fits a model with k clusters to the rows of the embedding, with the given options and seed
+clustering_methods: Dict[str, Callable[..., Any]] = {
+    'kmeans': lambda k, seed, **options: KMeans(n_clusters=k, random_state=seed, **options),
+    # stops early once the centers move less than tol or the inertia does not improve for max_no_improvement batches
+    'mini_batch_kmeans': lambda k, seed, **options: MiniBatchKMeans(
+        n_clusters=k, random_state=seed, **{'batch_size': 4096, 'tol': 1e-4, 'max_no_improvement': 10, **options}
+    )
+}
+
+
+def _arpack(M: sparse.spmatrix, k: int, generator: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    # a Lanczos basis larger than the default converges in fewer restarts when the eigenvalues are clustered
+    return eigsh(M, k=k, which='LA', v0=generator.random(M.shape[0]), ncv=min(M.shape[0], max(2 * k + 1, 4 * k)))
+
+
+def _lobpcg(M: sparse.spmatrix, k: int, generator: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    values, vectors = lobpcg(M, generator.random((M.shape[0], k)), largest=True, tol=1e-8, maxiter=1000)
+    order = np.argsort(values)
+
+    return values[order], vectors[:, order]
+
+
+# each eigensolver returns the k largest eigenvalues of a sparse symmetric matrix, in ascending order, and their vectors
+eigensolvers: Dict[str, Callable[[sparse.spmatrix, int, np.random.Generator], Tuple[np.ndarray, np.ndarray]]] = {
+    'arpack': _arpack,
+    'lobpcg': _lobpcg
+}
+
+
+def sparse_adjacency(G: Union[nx.Graph, sparse.spmatrix]) -> sparse.csr_matrix:
+    """
+    :param G: nx graph, or its adjacency matrix
+    :return: the adjacency matrix of the graph as a scipy sparse matrix in CSR format
+    """
+    if sparse.issparse(G):
+        return sparse.csr_matrix(G, dtype=np.float64)
+
+    if hasattr(nx, 'to_scipy_sparse_array'):
+        return sparse.csr_matrix(nx.to_scipy_sparse_array(G, dtype=np.float64, format='csr'))
+
+    return nx.to_scipy_sparse_matrix(G, dtype=np.float64, format='csr')
+
+
+def _largest_eigenpairs(
+        M: sparse.spmatrix,
+        k: int,
+        eigensolver: str,
+        generator: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: the k largest eigenvalues of the sparse symmetric matrix M, in ascending order, and their vectors. Small
+             matrices, for which the partial eigensolvers do not apply, are decomposed densely.
+    """
+    if k >= M.shape[0] - 1:
+        values, vectors = linalg.eigh(M.toarray())
+        return values[-k:], vectors[:, -k:]
+
+    return eigensolvers[eigensolver](M, k, generator)
+
+
+def _cluster_embedding(
+        values: np.ndarray,
+        vectors: np.ndarray,
+        scaling: np.ndarray,
+        number_of_clusters_selection: str,
+        k: int,
+        clustering: str,
+        clustering_options: Optional[Dict[str, Any]],
+        seed: Optional[int],
+        verbose: bool,
+        timings: Dict[str, float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function selects the number of clusters from the largest eigenvalues of the normalized affinity matrix, and
+    clusters the rows of the embedding given by their vectors.
+
+    :param values: the largest eigenvalues of the normalized affinity matrix, in ascending order
+    :param vectors: the corresponding eigenvectors
+    :param scaling: the inverse of the square roots of the degrees
+    :return: the label of each vertex and the Fiedler vector of the random walk laplacian
+    """
+    start = time.perf_counter()
+    k = selection_methods[number_of_clusters_selection](values[::-1], k)
+    timings['selection'] = time.perf_counter() - start
+
+    if verbose and number_of_clusters_selection == 'auto':
+        print('The estimated optimal number of clusters is {}.'.format(k))
+
+    start = time.perf_counter()
+    X = vectors[:, -k:]
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    Y = X / np.where(norms > 0, norms, 1.0)
+    result = clustering_methods[clustering](k, seed, **(clustering_options or {})).fit(Y).labels_
+    timings['clustering'] = time.perf_counter() - start
+
+    if verbose:
+        print('Clusters computed.')
+
+    # the second eigenvector v2 of the normalized affinity is the Fiedler vector of the normalized laplacian, and
+    # D^-1/2 v2 solves (D - A) x = lambda D x, so it is the Fiedler vector of the random walk laplacian, obtained
+    # without another eigendecomposition
+    return result, scaling * vectors[:, -2]
+
+
+def _scaling(degrees: np.ndarray) -> np.ndarray:
+    """
+    :param degrees: the degrees of the vertices
+    :return: the inverse of the square roots of the degrees, zero for the isolated vertices
+    """
+    return np.divide(1.0, np.sqrt(degrees), out=np.zeros_like(degrees), where=degrees > 0)
+
+
+def _eigenpairs_number(number_of_clusters_selection: str, k: int, k_max: int, n: int) -> int:
+    """
+    :return: the number of largest eigenpairs needed to select k, to embed the vertices and for the Fiedler vector
+    """
+    return min(n, max(2, k_max if number_of_clusters_selection == 'auto' else k))
+
+
+def sparse_spectral_clustering(
+        G: Union[nx.Graph, sparse.spmatrix],
+        number_of_clusters_selection: str = 'auto',
+        k: int = 10,
+        k_max: int = 20,
+        eigensolver: str = 'arpack',
+        clustering: str = 'mini_batch_kmeans',
+        clustering_options: Optional[Dict[str, Any]] = None,
+        threads: Optional[int] = None,
+        seed: Optional[int] = None,
+        verbose: bool = True,
+        timings: Optional[Dict[str, float]] = None
+) -> Tuple[np.ndarray, np.ndarray, sparse.csr_matrix]:
+    """
+    This function implements the same algorithm as spectral_clustering on a sparse adjacency matrix. The affinity
+    matrix is normalized by scaling its entries with the degrees of their vertices, and only the largest eigenpairs
+    needed are computed with a partial eigensolver: k_max ones for the automatic selection of k, or k ones otherwise.
+
+    :param G: nx graph, or its adjacency matrix
+    :param number_of_clusters_selection: either auto or manual, determines how k is selected
+    :param k: the number of clusters to be identified, works if selection method is manual
+    :param k_max: the number of eigenvalues inspected by the automatic selection, the largest possible k
+    :param eigensolver: either arpack or lobpcg, the partial eigensolver
+    :param clustering: either kmeans or mini_batch_kmeans, the method clustering the embedding
+    :param clustering_options: the options of the clustering method, as in its sklearn class
+    :param threads: the number of threads of the numerical libraries, by default all the cores
+    :param seed: the seed of the eigensolver and of the clustering
+    :param verbose: if true, prints updates on the status of the computation
+    :param timings: if given, the dictionary where the seconds spent in each stage are stored
+    :return: returns a numpy array of shape (number of vertices,) containing the label for each vertex,
+                     a numpy array of shape (number of vertices,) containing the Fiedler vector of the random walk
+                     laplacian I - D^-1 A, the solution of (D - A) x = lambda D x for the second smallest lambda,
+                     which differs from the Fiedler vector of the laplacian D - A,
+                     a scipy sparse matrix of shape (number of vertices, number of vertices) containing the adjacency
+                     matrix
+    """
+
+    if verbose:
+        print('Computing clusters...')
+
+    timings = timings if timings is not None else {}
+
+    with threadpool_limits(limits=threads):
+        start = time.perf_counter()
+        A = sparse_adjacency(G)
+        scaling = _scaling(np.asarray(A.sum(axis=1)).ravel())
+        # D^-1/2 A D^-1/2, scaling each entry instead of inverting D
+        L = sparse.csr_matrix(A.multiply(scaling[:, None]).multiply(scaling[None, :]))
+        timings['adjacency'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # returns eigenvalues and vectors in ascending order
+        values, vectors = _largest_eigenpairs(
+            L,
+            _eigenpairs_number(number_of_clusters_selection, k, k_max, L.shape[0]),
+            eigensolver,
+            np.random.default_rng(seed)
+        )
+        timings['eigendecomposition'] = time.perf_counter() - start
+
+        result, fiedler = _cluster_embedding(
+            values, vectors, scaling, number_of_clusters_selection, k, clustering, clustering_options, seed, verbose,
+            timings
+        )
+
+    return result, fiedler, A
+
 
 def spectral_clustering(
         G: nx.Graph,
         number_of_clusters_selection: str = 'auto',
         k: int = 10,
-        verbose: bool = True
+        verbose: bool = True,
+        k_max: int = 20,
+        clustering: str = 'kmeans',
+        clustering_options: Optional[Dict[str, Any]] = None,
+        threads: Optional[int] = None,
+        seed: Optional[int] = None,
+        timings: Optional[Dict[str, float]] = None
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     This function implements the algorithm described in
@@ -26,46 +222,59 @@ def spectral_clustering(
 
     This function computes k clusters in the graph contained in file with spectral clustering and returns a numpy
     array of shape (number of vertices,) containing the label for each vertex, the Fiedler vector and
-    the adjacency matrix of the graph
+    the adjacency matrix of the graph. Only the largest eigenpairs of the normalized affinity matrix are computed, and
+    they give both the clusters and the Fiedler vector. For large graphs, see sparse_spectral_clustering.
 
     :param G: nx graph
     :param number_of_clusters_selection: either auto or manual, determines how k is selected
     :param k: the number of clusters to be identified, works if selection method is manual
     :param verbose: if true, prints updates on the status of the computation
+    :param k_max: the number of eigenvalues inspected by the automatic selection, the largest possible k
+    :param clustering: either kmeans or mini_batch_kmeans, the method clustering the embedding
+    :param clustering_options: the options of the clustering method, as in its sklearn class
+    :param threads: the number of threads of the numerical libraries, by default all the cores
+    :param seed: the seed of the clustering
+    :param timings: if given, the dictionary where the seconds spent in each stage are stored
     :return: returns a numpy array of shape (number of vertices,) containing the label for each vertex,
-                     a numpy array of shape (number of vertices,) containing the Fiedler vector,
-                     a numpy matrix of shape (number of vertices, number of vertices) containing the adjacency matrix
+                     a numpy array of shape (number of vertices,) containing the Fiedler vector of the random walk
+                     laplacian I - D^-1 A, the solution of (D - A) x = lambda D x for the second smallest lambda,
+                     which differs from the Fiedler vector of the laplacian D - A,
+                     a numpy array of shape (number of vertices, number of vertices) containing the adjacency matrix
     """
 
     if verbose:
         print('Computing clusters...')
 
-    A = nx.to_numpy_matrix(G)
-    D = np.diagflat(np.sum(A, axis=1))
-    D_inv = np.linalg.inv(np.sqrt(D))
-    L = D_inv @ A @ D_inv
-    # returns eigenvalues and vectors in ascending order
-    values, vectors = linalg.eigh(L)
+    timings = timings if timings is not None else {}
 
-    k = selection_methods[number_of_clusters_selection](values[::-1], k)
+    with threadpool_limits(limits=threads):
+        start = time.perf_counter()
+        A = nx.to_numpy_array(G)
+        scaling = _scaling(np.sum(A, axis=1))
+        L = A * scaling[:, None] * scaling[None, :]
+        timings['adjacency'] = time.perf_counter() - start
 
-    if verbose and number_of_clusters_selection == 'auto':
-        print('The estimated optimal number of clusters is {}.'.format(k))
+        start = time.perf_counter()
+        n = L.shape[0]
+        # returns eigenvalues and vectors in ascending order
+        values, vectors = linalg.eigh(
+            L, subset_by_index=[n - _eigenpairs_number(number_of_clusters_selection, k, k_max, n), n - 1]
+        )
+        timings['eigendecomposition'] = time.perf_counter() - start
 
-    X = vectors[:, -k:]
-    Y = X / np.linalg.norm(X, axis=1, keepdims=True)
-    result = KMeans(n_clusters=k).fit(Y).labels_
+        result, fiedler = _cluster_embedding(
+            values, vectors, scaling, number_of_clusters_selection, k, clustering, clustering_options, seed, verbose,
+            timings
+        )
 
-    if verbose:
-        print('Clusters computed.')
-
-    # vectors of the laplacian for the fiedler
-    _, vectors = linalg.eigh(D-A)
-
-    return result, vectors[:, 1], A
+    return result, fiedler, A
 
 
 if __name__ == '__main__':
-    result = spectral_clustering('../data/example1.dat')
+    from utils import load_graph
+
+    stage_timings: Dict[str, float] = {}
+    result, _, _ = spectral_clustering(load_graph('../data/example1.dat'), timings=stage_timings)
 
     print(result.shape)
+    print(stage_timings)
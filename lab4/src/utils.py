@@ -1,4 +1,11 @@
+from typing import Tuple
+
 import networkx as nx
+import numpy as np
+from scipy import sparse
+
+import _common  # noqa: F401, makes the common modules importable
+from graph_io import adjacency_matrix, load_edge_list
 
 
 def load_graph(file: str, weight: bool = False) -> nx.Graph:
@@ -23,6 +30,22 @@ def load_graph(file: str, weight: bool = False) -> nx.Graph:
         )
 
 
+def load_adjacency(file: str, weight: bool = False, cache: bool = False) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    This function takes as input the path to a file containing a list of edges (and optionally weights) in a graph
+    and outputs its adjacency matrix without building a networkx graph, see graph_io.load_edge_list.
+
+    :param file: the path to the file representing the graph
+    :param weight: indicates if the file contains edge weights or not
+    :param cache: if true, uses a binary cache of the file
+    :return: a scipy sparse matrix in CSR format containing the adjacency matrix, and a numpy array containing the
+             label of the vertex of each row
+    """
+    edge_list = load_edge_list(file=file, weighted=weight, cache=cache)
+
+    return adjacency_matrix(edge_list), np.asarray(edge_list.labels)
+
+
 if __name__ == '__main__':
     G = load_graph('../data/example1.dat')
 